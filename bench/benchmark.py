@@ -0,0 +1,232 @@
+"""Benchmark the Palantir MCP tools against the local mock Foundry API.
+
+Starts bench/mock_foundry.py, launches servers/palantir_tools.py through
+client.py's MCPClient and drives each tool scenario with concurrent calls.
+Reports throughput, p50/p99 latency, upstream request counts and peak RSS,
+and optionally compares them against a baseline so CI can fail on
+regressions:
+
+    uv sync --extra bench
+    python bench/benchmark.py --output bench-results.json
+    python bench/benchmark.py --baseline bench-results.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mock_foundry  # noqa: E402
+
+OBJECT_TYPE = "BenchObject0"
+
+def _scenarios(objects: int) -> Dict[str, Tuple[str, Callable[[int], dict]]]:
+    """Tool name and per-iteration arguments of each scenario; arguments vary so coalescing cannot hide the work."""
+    return {
+        "list_object_types": ("list_object_types", lambda i: {"limit": 100 + i % 7}),
+        "get_object": ("get_object", lambda i: {"object_type_id": OBJECT_TYPE, "primary_key": str(i % objects)}),
+        "list_objects": ("list_objects", lambda i: {"object_type_id": OBJECT_TYPE, "limit": 1000 - i % 10, "pagesize": 100}),
+        "search_objects": ("search_objects", lambda i: {"object_type_id": OBJECT_TYPE, "limit": 500, "pagesize": 100,
+                                                        "query": [{"gte": ["value", i % 50]}]}),
+        "get_objects": ("get_objects", lambda i: {"object_type_id": OBJECT_TYPE,
+                                                  "primary_keys": [str((i * 500 + j) % objects) for j in range(500)]}),
+        "traverse_links": ("traverse_links", lambda i: {"object_type_id": OBJECT_TYPE, "primary_keys": [str((i * 10 + j) % objects) for j in range(10)],
+                                                        "links": ["related", "related", "parent"],
+                                                        "properties": [["name"], ["name", "category"], None]}),
+        "aggregate_objects": ("aggregate_objects", lambda i: {"object_type_id": OBJECT_TYPE, "groupby": [{"exact": ["category"]}],
+                                                              "aggregation": [{"count": []}, {"avg": ["value", "avg_value"]}],
+                                                              "query": [{"gte": ["quantity", i % 100]}]}),
+        "apply_batch_actions": ("apply_batch_actions", lambda i: {"action_id": "benchAction",
+                                                                  "inputs": [{"id": str(i * 100 + j)} for j in range(100)]}),
+    }
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))]
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _child_peak_rss(exclude: int) -> Optional[int]:
+    """Largest VmHWM in bytes among this process's children except ``exclude``; None where /proc is unavailable."""
+    if not os.path.isdir("/proc"):
+        return None
+    peak = None
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit() or int(entry) == exclude:
+            continue
+        try:
+            with open(f"/proc/{entry}/status") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        if int(fields.get("PPid", "0")) == os.getpid() and "VmHWM" in fields:
+            peak = max(peak or 0, int(fields["VmHWM"].split()[0]) * 1024)
+    return peak
+
+def _start_mock(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    command = [sys.executable, os.path.join(ROOT, "bench", "mock_foundry.py"), "--port", str(port),
+               "--objects", str(args.objects), "--object-types", str(args.object_types),
+               "--max-page-size", str(args.max_page_size), "--links-per-object", str(args.links_per_object),
+               "--latency-ms", str(args.latency_ms),
+               "--jitter-ms", str(args.jitter_ms), "--throttle-rate", str(args.throttle_rate),
+               "--retry-after", str(args.retry_after), "--token-ttl", str(args.token_ttl), "--seed", str(args.seed)]
+    process = subprocess.Popen(command)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/_stats", timeout=1)
+            return process
+        except httpx.TransportError:
+            if process.poll() is not None:
+                raise RuntimeError(f"Mock Foundry server exited with code {process.returncode}")
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Mock Foundry server did not start within 30s")
+
+async def _mock_requests(client: httpx.AsyncClient) -> dict:
+    return (await client.get("/_stats")).json()
+
+async def _run_scenario(session, tool: str, arguments: Callable[[int], dict], iterations: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def call(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            result = await session.call_tool(tool, {"params": arguments(i)})
+            latencies.append(time.perf_counter() - start)
+        try:
+            failed = result.isError or json.loads(result.content[0].text).get("success") is False
+        except (ValueError, IndexError, AttributeError):
+            failed = True
+        if failed:
+            errors += 1
+
+    await call(-1)
+    latencies.clear()
+    errors = 0
+    start = time.perf_counter()
+    await asyncio.gather(*[call(i) for i in range(iterations)])
+    elapsed = time.perf_counter() - start
+    return {
+        "calls": iterations,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput": round(iterations / elapsed, 3),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+    }
+
+async def run(args: argparse.Namespace) -> dict:
+    os.environ.setdefault("ANTHROPIC_API_KEY", "unused-by-benchmark")
+    from client import MCPClient
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    mock = _start_mock(args, port)
+    cache_dir = tempfile.mkdtemp(prefix="palantir-bench-")
+    env = {
+        **os.environ,
+        "PALANTIR_ENDPOINT": f"{base_url}/",
+        "PALANTIR_SECURITY_ENDPOINT": f"{base_url}{mock_foundry.TOKEN_PATH}",
+        "CLIENT_ID": "bench",
+        "CLIENT_SECRET": "bench",
+        "ONTOLOGY_ID": "bench",
+        "METADATA_CACHE_PATH": os.path.join(cache_dir, "metadata.json"),
+        "RESULT_CACHE_MAX_BYTES": str(args.result_cache_bytes),
+        "COALESCE_WINDOW": "0",
+    }
+    selected = _scenarios(args.objects)
+    if args.scenarios:
+        selected = {name: selected[name] for name in args.scenarios.split(",")}
+    report: Dict[str, Any] = {"config": {k: v for k, v in vars(args).items() if k not in ("baseline", "output")}, "scenarios": {}}
+    try:
+        async with httpx.AsyncClient(base_url=base_url) as mock_client:
+            async with MCPClient() as client:
+                start = time.perf_counter()
+                await client.connect(os.path.join(ROOT, "servers", "palantir_tools.py"), env=env)
+                report["startup_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                for name, (tool, arguments) in selected.items():
+                    before = await _mock_requests(mock_client)
+                    result = await _run_scenario(client.session, tool, arguments, args.iterations, args.concurrency)
+                    after = await _mock_requests(mock_client)
+                    result["upstream_requests"] = after["total"] - before["total"]
+                    result["throttled"] = after["throttled"] - before["throttled"]
+                    report["scenarios"][name] = result
+                    print(f"{name:<22} {result['throughput']:>9.2f}/s  p50 {result['p50_ms']:>9.2f}ms  p99 {result['p99_ms']:>9.2f}ms"
+                          f"  upstream {result['upstream_requests']:>6}  throttled {result['throttled']:>4}  errors {result['errors']}")
+                server_rss = _child_peak_rss(exclude=mock.pid)
+    finally:
+        mock.terminate()
+        mock.wait()
+    report["server_peak_rss_mb"] = round(server_rss / 2 ** 20, 2) if server_rss else None
+    report["client_peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    print(f"startup {report['startup_ms']:.1f}ms  server peak RSS {report['server_peak_rss_mb']}MB"
+          f"  client peak RSS {report['client_peak_rss_mb']}MB")
+    return report
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Describe every metric that is worse than the baseline by more than ``tolerance``."""
+    regressions = list()
+    for name, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name} {metric} {base[metric]} -> {result[metric]}")
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name} throughput {base['throughput']} -> {result['throughput']}")
+        if result["upstream_requests"] > base["upstream_requests"] * (1 + tolerance):
+            regressions.append(f"{name} upstream_requests {base['upstream_requests']} -> {result['upstream_requests']}")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name} errors {base['errors']} -> {result['errors']}")
+    for metric in ("server_peak_rss_mb", "startup_ms"):
+        if report.get(metric) and baseline.get(metric) and report[metric] > baseline[metric] * (1 + tolerance):
+            regressions.append(f"{metric} {baseline[metric]} -> {report[metric]}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mock_foundry.add_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=50, help="Calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent calls per scenario")
+    parser.add_argument("--scenarios", default=None, help=f"Comma separated subset of {','.join(_scenarios(1))}")
+    parser.add_argument("--result-cache-bytes", type=int, default=0, help="RESULT_CACHE_MAX_BYTES of the server, 0 disables the cache")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this path")
+    parser.add_argument("--baseline", default=None, help="Report of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression against the baseline")
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
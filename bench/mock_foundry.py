@@ -0,0 +1,404 @@
+"""Local stand-in for the Palantir Foundry ontology API used by servers/palantir_tools.py.
+
+Serves the client-credentials token endpoint and the objectTypes, objects,
+linked objects, search, aggregate, actionTypes, apply and applyBatch
+endpoints over a generated dataset. Latency, page size caps, dataset size and 429 injection
+are configurable so the MCP tools can be benchmarked without a tenant.
+
+    python bench/mock_foundry.py --port 8900 --objects 10000 --latency-ms 20 --throttle-rate 0.05
+
+Point the server at it with PALANTIR_ENDPOINT=http://127.0.0.1:8900/ and
+PALANTIR_SECURITY_ENDPOINT=http://127.0.0.1:8900/multipass/api/oauth2/token.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+TOKEN_PATH = "/multipass/api/oauth2/token"
+LINK_TYPES = {"related": "MANY", "parent": "ONE"}
+CATEGORIES = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", "iota", "kappa"]
+PROPERTIES = {
+    "id": "string",
+    "name": "string",
+    "category": "string",
+    "value": "double",
+    "quantity": "integer",
+    "active": "boolean",
+    "updatedAt": "timestamp",
+}
+
+@dataclass
+class MockConfig:
+    objects: int = 10000
+    object_types: int = 1
+    max_page_size: int = 1000
+    links_per_object: int = 3
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 0.1
+    token_ttl: int = 3600
+    seed: int = 0
+
+class MockFoundry:
+    """Generated dataset plus request counters shared by the route handlers."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.requests: Counter = Counter()
+        self.throttled = 0
+        self.type_names = [f"BenchObject{i}" for i in range(config.object_types)]
+        self._data: Dict[str, List[dict]] = dict()
+
+    def data(self, object_type: str) -> List[dict]:
+        if object_type not in self._data:
+            rng = random.Random(f"{self.config.seed}:{object_type}")
+            start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+            self._data[object_type] = [{
+                "__rid": f"ri.phonograph2-objects.main.object.{object_type}.{i}",
+                "__apiName": object_type,
+                "__primaryKey": str(i),
+                "id": str(i),
+                "name": f"{object_type} {i}",
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "value": round(rng.uniform(0, 100), 3),
+                "quantity": rng.randint(0, 1000),
+                "active": i % 3 != 0,
+                "updatedAt": (start + timedelta(seconds=i * 60)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            } for i in range(self.config.objects)]
+        return self._data[object_type]
+
+    def schema(self, object_type: str) -> dict:
+        return {
+            "apiName": object_type,
+            "displayName": object_type,
+            "description": "Generated benchmark object type",
+            "primaryKey": "id",
+            "titleProperty": "name",
+            "status": "ACTIVE",
+            "rid": f"ri.ontology.main.object-type.{object_type}",
+            "properties": {name: {"dataType": {"type": data_type}} for name, data_type in PROPERTIES.items()},
+        }
+
+    def linked(self, object_type: str, primary_key: int, link_type: str) -> List[dict]:
+        """``related`` links each object to ``links_per_object`` others, ``parent`` links object i to i // 10."""
+        items = self.data(object_type)
+        if link_type == "parent":
+            return [items[primary_key // 10]] if primary_key >= 10 else []
+        return [items[(primary_key * 7 + k * 13 + 1) % len(items)] for k in range(self.config.links_per_object)]
+
+    def touch(self, parameters: dict):
+        """Actions modify the first object type's object named by an ``id`` parameter, moving its ``updatedAt``."""
+        items = self.data(self.type_names[0])
+        primary_key = str(parameters.get("id", ""))
+        if primary_key.isdigit() and int(primary_key) < len(items):
+            items[int(primary_key)]["updatedAt"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    async def delay(self):
+        latency = self.config.latency_ms + self.random.uniform(0, self.config.jitter_ms)
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+def _error(status: int, name: str, message: str, **headers) -> JSONResponse:
+    return JSONResponse({"errorCode": "INVALID_ARGUMENT" if status == 400 else name, "errorName": name,
+                         "parameters": {"message": message}}, status_code=status, headers=headers)
+
+_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}")
+
+def _comparable(value: Any) -> Any:
+    """Timestamps as instants, so they compare like Foundry compares them rather than as strings."""
+    if not isinstance(value, str) or not _TIMESTAMP.match(value):
+        return value
+    try:
+        parsed = datetime.fromisoformat(re.sub(r"(\.\d{6})\d+", r"\1", value).replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _predicate(where: Optional[dict]) -> Callable[[dict], bool]:
+    """Compile an ontology ``where`` clause into a Python predicate."""
+    if not where:
+        return lambda obj: True
+    kind = where["type"]
+    if kind in ("and", "or"):
+        children = [_predicate(c) for c in where["value"]]
+        combine = all if kind == "and" else any
+        return lambda obj: combine(c(obj) for c in children)
+    if kind == "not":
+        child = _predicate(where["value"])
+        return lambda obj: not child(obj)
+    field, value = where.get("field"), where.get("value")
+    def get(obj):
+        return obj.get(field[len("properties."):] if field.startswith("properties.") else field)
+    def compare(op):
+        def check(obj):
+            actual = get(obj)
+            return actual is not None and op(_comparable(actual), _comparable(value))
+        return check
+    if kind == "eq":
+        return lambda obj: _comparable(get(obj)) == _comparable(value)
+    if kind == "in":
+        values = {_comparable(v) for v in value}
+        return lambda obj: _comparable(get(obj)) in values
+    if kind == "isNull":
+        return lambda obj: (get(obj) is None) == bool(value)
+    if kind == "gt":
+        return compare(lambda a, b: a > b)
+    if kind == "gte":
+        return compare(lambda a, b: a >= b)
+    if kind == "lt":
+        return compare(lambda a, b: a < b)
+    if kind == "lte":
+        return compare(lambda a, b: a <= b)
+    if kind == "startsWith":
+        return lambda obj: get(obj) is not None and str(get(obj)).startswith(value)
+    if kind in ("contains", "containsAnyTerm", "containsAllTerms", "phrase"):
+        return lambda obj: get(obj) is not None and str(value).lower() in str(get(obj)).lower()
+    raise ValueError(f"Unsupported filter type {kind}")
+
+def _order(items: List[dict], fields: List[dict]) -> List[dict]:
+    for spec in reversed(fields):
+        field = spec["field"]
+        field = field[len("properties."):] if field.startswith("properties.") else field
+        items = sorted(items, key=lambda obj: (obj.get(field) is None, _comparable(obj.get(field))), reverse=spec.get("direction") == "desc")
+    return items
+
+def _page(foundry: MockFoundry, items: List[dict], page_size: Optional[Any], page_token: Optional[str], select: Optional[List[str]]) -> dict:
+    size = min(int(page_size or foundry.config.max_page_size), foundry.config.max_page_size)
+    start = int(page_token or 0)
+    data = items[start:start + size]
+    if select:
+        data = [{k: v for k, v in obj.items() if k.startswith("__") or k in select} for obj in data]
+    body = {"data": data, "totalCount": str(len(items))}
+    if start + size < len(items):
+        body["nextPageToken"] = str(start + size)
+    return body
+
+def _aggregate(items: List[dict], group_by: List[dict], aggregations: List[dict]) -> List[dict]:
+    def key(obj):
+        group = dict()
+        for spec in group_by:
+            value = obj.get(spec["field"])
+            if spec["type"] == "ranges":
+                value = next(({"startValue": r.get("startValue"), "endValue": r.get("endValue")} for r in spec["ranges"]
+                              if value is not None and (r.get("startValue") is None or value >= r["startValue"])
+                              and (r.get("endValue") is None or value < r["endValue"])), None)
+                if value is None:
+                    return None
+            elif spec["type"] == "fixedWidth":
+                value = None if value is None else value - value % spec["fixedWidth"]
+            group[spec["field"]] = value
+        return group
+    groups: Dict[str, tuple] = dict()
+    for obj in items:
+        group = key(obj)
+        if group is None:
+            continue
+        groups.setdefault(json.dumps(group, sort_keys=True, default=str), (group, []))[1].append(obj)
+    results = list()
+    for group, members in groups.values():
+        metrics = list()
+        for spec in aggregations:
+            kind = spec["type"]
+            field = (spec.get("field") or "")
+            field = field[len("properties."):] if field.startswith("properties.") else field
+            values = [obj.get(field) for obj in members if obj.get(field) is not None]
+            if kind == "count":
+                value = len(members)
+            elif kind == "sum":
+                value = sum(values)
+            elif kind == "avg":
+                value = sum(values) / len(values) if values else None
+            elif kind == "min":
+                value = min(values, default=None)
+            elif kind == "max":
+                value = max(values, default=None)
+            elif kind in ("approximateDistinct", "exactDistinct"):
+                value = len(set(values))
+            else:
+                raise ValueError(f"Unsupported aggregation type {kind}")
+            metrics.append({"name": spec.get("name") or (kind if kind == "count" else f"{field}.{kind}"), "value": value})
+        results.append({"group": group, "metrics": metrics})
+    return results
+
+def create_app(config: MockConfig) -> Starlette:
+    foundry = MockFoundry(config)
+
+    def endpoint(name: str, authenticated: bool = True):
+        def decorator(fn):
+            async def handler(request: Request) -> Response:
+                foundry.requests[name] += 1
+                await foundry.delay()
+                if config.throttle_rate and foundry.random.random() < config.throttle_rate:
+                    foundry.throttled += 1
+                    return _error(429, "TooManyRequests", "Injected throttling", **{"Retry-After": f"{config.retry_after:g}"})
+                if authenticated and not request.headers.get("Authorization"):
+                    return _error(401, "MissingCredentials", "No Authorization header")
+                object_type = request.path_params.get("object_type")
+                if object_type is not None and object_type not in foundry.type_names:
+                    return _error(404, "ObjectTypeNotFound", f"Unknown object type {object_type}")
+                try:
+                    return await fn(request)
+                except (ValueError, KeyError, TypeError) as e:
+                    return _error(400, "InvalidRequest", str(e))
+            return handler
+        return decorator
+
+    @endpoint("token", authenticated=False)
+    async def token(request: Request) -> Response:
+        form = await request.form()
+        if form.get("grant_type") != "client_credentials":
+            return _error(400, "InvalidGrant", "grant_type must be client_credentials")
+        return JSONResponse({"access_token": f"mock-{foundry.random.getrandbits(64):x}", "token_type": "bearer",
+                             "expires_in": config.token_ttl})
+
+    @endpoint("objectTypes")
+    async def list_object_types(request: Request) -> Response:
+        items = [foundry.schema(name) for name in foundry.type_names]
+        return JSONResponse(_page(foundry, items, request.query_params.get("pageSize"), request.query_params.get("pageToken"), None))
+
+    @endpoint("objectType")
+    async def get_object_type(request: Request) -> Response:
+        body = json.dumps(foundry.schema(request.path_params["object_type"])).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(body, media_type="application/json", headers={"ETag": etag})
+
+    @endpoint("objects")
+    async def list_objects(request: Request) -> Response:
+        params = request.query_params
+        items = foundry.data(request.path_params["object_type"])
+        if params.get("orderBy"):
+            fields = [{"field": f.split(":")[0][2:] if f.startswith("p.") else f.split(":")[0],
+                       "direction": f.split(":")[1] if ":" in f else "asc"} for f in params["orderBy"].split(",")]
+            items = _order(items, fields)
+        return JSONResponse(_page(foundry, items, params.get("pageSize"), params.get("pageToken"), params.getlist("select")))
+
+    @endpoint("object")
+    async def get_object(request: Request) -> Response:
+        items = foundry.data(request.path_params["object_type"])
+        primary_key = request.path_params["primary_key"]
+        if not primary_key.isdigit() or int(primary_key) >= len(items):
+            return _error(404, "ObjectNotFound", f"Unknown primary key {primary_key}")
+        return JSONResponse(items[int(primary_key)])
+
+    @endpoint("search")
+    async def search_objects(request: Request) -> Response:
+        body = await request.json()
+        predicate = _predicate(body.get("where"))
+        items = [obj for obj in foundry.data(request.path_params["object_type"]) if predicate(obj)]
+        if body.get("orderBy"):
+            items = _order(items, body["orderBy"]["fields"])
+        return JSONResponse(_page(foundry, items, body.get("pageSize"), body.get("pageToken"), body.get("select")))
+
+    @endpoint("aggregate")
+    async def aggregate_objects(request: Request) -> Response:
+        body = await request.json()
+        predicate = _predicate(body.get("where"))
+        items = [obj for obj in foundry.data(request.path_params["object_type"]) if predicate(obj)]
+        data = _aggregate(items, body.get("groupBy") or [], body.get("aggregation") or [{"type": "count"}])
+        return JSONResponse({"accuracy": "ACCURATE", "data": data})
+
+    @endpoint("linkType")
+    async def get_link_type(request: Request) -> Response:
+        link_type = request.path_params["link_type"]
+        if link_type not in LINK_TYPES:
+            return _error(404, "LinkTypeNotFound", f"Unknown link type {link_type}")
+        return JSONResponse({"apiName": link_type, "objectTypeApiName": request.path_params["object_type"],
+                             "cardinality": LINK_TYPES[link_type], "status": "ACTIVE"})
+
+    @endpoint("links")
+    async def list_linked_objects(request: Request) -> Response:
+        items = foundry.data(request.path_params["object_type"])
+        primary_key, link_type = request.path_params["primary_key"], request.path_params["link_type"]
+        if link_type not in LINK_TYPES:
+            return _error(404, "LinkTypeNotFound", f"Unknown link type {link_type}")
+        if not primary_key.isdigit() or int(primary_key) >= len(items):
+            return _error(404, "ObjectNotFound", f"Unknown primary key {primary_key}")
+        linked = foundry.linked(request.path_params["object_type"], int(primary_key), link_type)
+        params = request.query_params
+        return JSONResponse(_page(foundry, linked, params.get("pageSize"), params.get("pageToken"), params.getlist("select")))
+
+    @endpoint("actionType")
+    async def get_action_type(request: Request) -> Response:
+        action = request.path_params["action"]
+        return JSONResponse({"apiName": action, "displayName": action, "status": "ACTIVE",
+                             "operations": [{"type": "modifyObject", "objectTypeApiName": foundry.type_names[0]}]})
+
+    @endpoint("apply")
+    async def apply_action(request: Request) -> Response:
+        body = await request.json()
+        foundry.touch(body.get("parameters") or {})
+        return JSONResponse({"validation": {"result": "VALID", "submissionCriteria": [], "parameters": {}}})
+
+    @endpoint("applyBatch")
+    async def apply_batch(request: Request) -> Response:
+        body = await request.json()
+        if not isinstance(body.get("requests"), list):
+            raise ValueError("requests must be a list")
+        for item in body["requests"]:
+            foundry.touch(item.get("parameters") or {})
+        return JSONResponse({})
+
+    async def stats(request: Request) -> Response:
+        return JSONResponse({"requests": dict(foundry.requests), "total": sum(foundry.requests.values()), "throttled": foundry.throttled})
+
+    ontology = "/api/v2/ontologies/{ontology}"
+    app = Starlette(routes=[
+        Route(TOKEN_PATH, token, methods=["POST"]),
+        Route(f"{ontology}/objectTypes", list_object_types, methods=["GET"]),
+        Route(f"{ontology}/objectTypes/{{object_type}}", get_object_type, methods=["GET"]),
+        Route(f"{ontology}/objectTypes/{{object_type}}/outgoingLinkTypes/{{link_type}}", get_link_type, methods=["GET"]),
+        Route(f"{ontology}/objects/{{object_type}}", list_objects, methods=["GET"]),
+        Route(f"{ontology}/objects/{{object_type}}/search", search_objects, methods=["POST"]),
+        Route(f"{ontology}/objects/{{object_type}}/aggregate", aggregate_objects, methods=["POST"]),
+        Route(f"{ontology}/objects/{{object_type}}/{{primary_key}}", get_object, methods=["GET"]),
+        Route(f"{ontology}/objects/{{object_type}}/{{primary_key}}/links/{{link_type}}", list_linked_objects, methods=["GET"]),
+        Route(f"{ontology}/actionTypes/{{action}}", get_action_type, methods=["GET"]),
+        Route(f"{ontology}/actions/{{action}}/apply", apply_action, methods=["POST"]),
+        Route(f"{ontology}/actions/{{action}}/applyBatch", apply_batch, methods=["POST"]),
+        Route("/_stats", stats, methods=["GET"]),
+    ])
+    app.state.foundry = foundry
+    return app
+
+def add_arguments(parser: argparse.ArgumentParser):
+    defaults = MockConfig()
+    parser.add_argument("--objects", type=int, default=defaults.objects, help="Objects per object type")
+    parser.add_argument("--object-types", type=int, default=defaults.object_types, help="Number of object types")
+    parser.add_argument("--max-page-size", type=int, default=defaults.max_page_size, help="Largest page the API returns")
+    parser.add_argument("--links-per-object", type=int, default=defaults.links_per_object, help="Objects reached over the related link")
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Fixed latency added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms, help="Uniform random latency added on top")
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--token-ttl", type=int, default=defaults.token_ttl, help="expires_in of issued tokens")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed for generated data and injected faults")
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(objects=args.objects, object_types=args.object_types, max_page_size=args.max_page_size,
+                      links_per_object=args.links_per_object, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, throttle_rate=args.throttle_rate,
+                      retry_after=args.retry_after, token_ttl=args.token_ttl, seed=args.seed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
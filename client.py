@@ -1,30 +1,192 @@
-from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 from typing_extensions import TypedDict
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.messages import SystemMessage, RemoveMessage
-from langgraph.graph import END, START, StateGraph, MessagesState
-from langgraph.checkpoint.memory import MemorySaver
-from typing import Annotated, List, Literal, Optional
-from langgraph.errors import NodeInterrupt, Interrupt
+from typing import Annotated, Any, Dict, List, Literal, Optional
 from fastmcp.client.transports import stdio_client
-from mcp import StdioServerParameters, ClientSession
+from mcp import StdioServerParameters, ClientSession, types
 from contextlib import AsyncExitStack
-from anthropic import Anthropic
 import asyncio
 import json
+import sys
+import time
+
+class PooledSession:
+    """One warm server process and its initialized ClientSession.
+
+    The stdio transport and the session are entered and exited inside a task
+    owned by this object, so a session can be opened by one caller and closed
+    by another.
+    """
+    def __init__(self, key, server_params, on_list_changed=None):
+        self.key = key
+        self.server_params = server_params
+        self.session:Optional[ClientSession]=None
+        self.last_used = time.monotonic()
+        self.last_checked = time.monotonic()
+        self._on_list_changed = on_list_changed
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task:Optional[asyncio.Task]=None
+        self._error:Optional[BaseException]=None
+
+    async def _handle_message(self, message):
+        if isinstance(message, types.ServerNotification) and self._on_list_changed:
+            if isinstance(message.root, (types.ToolListChangedNotification, types.ResourceListChangedNotification)):
+                self._on_list_changed(self.key)
+
+    async def _run(self):
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write, message_handler=self._handle_message) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self.session is None:
+            raise self._error or RuntimeError("Server session closed during startup")
+
+    @property
+    def alive(self):
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def ping(self, timeout):
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            self.last_checked = time.monotonic()
+            return True
+        except Exception:
+            return False
+
+    async def close(self):
+        self._closing.set()
+        if self._task:
+            try:
+                await self._task
+            except Exception as e:
+                print(f"Error during cleanup: {e}")
+
+class MCPSessionPool:
+    """Keeps warm server sessions per (server script, env) for reuse by MCPClient.
+
+    Sessions idle for longer than ``health_check_interval`` are pinged before
+    they are handed out again and replaced if the ping fails; sessions idle for
+    longer than ``idle_timeout`` are closed. ``list_tools``/``list_resources``
+    results are cached per server until it announces a list change.
+    """
+    def __init__(self, max_idle=4, idle_timeout=300.0, health_check_interval=30.0, ping_timeout=5.0):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+        self._idle:Dict[str, List[PooledSession]] = {}
+        self._tools:Dict[str, Any] = {}
+        self._resources:Dict[str, Any] = {}
+        self._closed = False
+
+    @staticmethod
+    def _key(server_script_path, env):
+        return json.dumps([server_script_path, env], sort_keys=True)
+
+    def invalidate(self, key=None):
+        """Forget cached tool and resource lists, of one server or of all of them."""
+        for cache in (self._tools, self._resources):
+            if key is None:
+                cache.clear()
+            else:
+                cache.pop(key, None)
+
+    async def acquire(self, server_script_path, env=None):
+        key = self._key(server_script_path, env)
+        await self._close_expired()
+        idle = self._idle.get(key, [])
+        while idle:
+            pooled = idle.pop()
+            if not pooled.alive:
+                await pooled.close()
+                continue
+            if time.monotonic() - pooled.last_checked >= self.health_check_interval and not await pooled.ping(self.ping_timeout):
+                await pooled.close()
+                continue
+            return pooled
+        server_params = StdioServerParameters(command=sys.executable,args=[server_script_path],env=env)
+        pooled = PooledSession(key, server_params, on_list_changed=self.invalidate)
+        await pooled.start()
+        return pooled
+
+    async def release(self, pooled, healthy=True):
+        pooled.last_used = time.monotonic()
+        idle = self._idle.setdefault(pooled.key, [])
+        if self._closed or not healthy or not pooled.alive or len(idle) >= self.max_idle:
+            await pooled.close()
+            return
+        idle.append(pooled)
+
+    async def warm(self, server_script_path, env=None, count=1):
+        """Start sessions ahead of time so the next ``count`` acquires find a warm server."""
+        sessions = await asyncio.gather(*[self.acquire(server_script_path, env) for _ in range(count)])
+        for pooled in sessions:
+            await self.release(pooled)
+
+    async def list_tools(self, pooled):
+        if pooled.key not in self._tools:
+            self._tools[pooled.key] = await pooled.session.list_tools()
+        return self._tools[pooled.key]
+
+    async def list_resources(self, pooled):
+        if pooled.key not in self._resources:
+            self._resources[pooled.key] = await pooled.session.list_resources()
+        return self._resources[pooled.key]
+
+    async def _close_expired(self):
+        """Detach every expired session before awaiting any close, so concurrent acquires and releases see a consistent pool"""
+        now = time.monotonic()
+        expired = []
+        for key, idle in list(self._idle.items()):
+            expired.extend(p for p in idle if now - p.last_used >= self.idle_timeout)
+            idle[:] = [p for p in idle if now - p.last_used < self.idle_timeout]
+        for pooled in expired:
+            await pooled.close()
+
+    async def close(self):
+        self._closed = True
+        sessions = [pooled for idle in self._idle.values() for pooled in idle]
+        self._idle.clear()
+        self.invalidate()
+        for pooled in sessions:
+            await pooled.close()
 
 class MCPClient:
-    def __init__(self):
+    def __init__(self, pool:Optional[MCPSessionPool]=None):
         self.session:Optional[ClientSession]=None
         self.exit_stack = AsyncExitStack()
-        self.anthropic = Anthropic()
+        self._anthropic=None
+        self.pool = pool
+        self._pooled:Optional[PooledSession]=None
+
+    @property
+    def anthropic(self):
+        """The Anthropic client, imported and created on first use so MCP-only callers don't need it"""
+        if self._anthropic is None:
+            from anthropic import Anthropic
+            self._anthropic = Anthropic()
+        return self._anthropic
 
-    async def connect(self,server_script_path):
+    async def connect(self,server_script_path,env=None):
+        if self.pool is not None:
+            self._pooled = await self.pool.acquire(server_script_path, env)
+            self.session = self._pooled.session
+            return
         try:
             
-            server_params = StdioServerParameters(command="python",args=[server_script_path],env=None)
+            server_params = StdioServerParameters(command=sys.executable,args=[server_script_path],env=env)
             
             stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
             
@@ -48,11 +210,19 @@ class MCPClient:
             raise
 
     async def list_resources(self):
+        if self._pooled is not None:
+            return await self.pool.list_resources(self._pooled)
         return await self.session.list_resources()
     async def list_tools(self):
+        if self._pooled is not None:
+            return await self.pool.list_tools(self._pooled)
         return await self.session.list_tools()
-    async def cleanup(self):
-        """Properly cleanup resources"""
+    async def cleanup(self, healthy=True):
+        """Properly cleanup resources; a pooled session goes back to the pool instead"""
+        if self._pooled is not None:
+            pooled, self._pooled, self.session = self._pooled, None, None
+            await self.pool.release(pooled, healthy=healthy)
+            return
         if self.exit_stack:
             try:
                 await self.exit_stack.aclose()
@@ -65,7 +235,7 @@ class MCPClient:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.cleanup()
+        await self.cleanup(healthy=exc_type is None)
 
 
 
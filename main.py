@@ -1,10 +1,16 @@
-from mcp.server.fastmcp.server import FastMCP, Image
 from typing_extensions import TypedDict
 from typing import Annotated, List, Literal, Optional
 from operator import add
+import argparse
+import os
+import uvicorn
+from servers.palantir_tools import mcp
 global mcp
 
-mcp = FastMCP("MyApp")
+# Sessions cannot follow a client across worker processes, so every request
+# is served statelessly by whichever worker accepts it.
+mcp.settings.stateless_http = True
+app = mcp.streamable_http_app()
 
 class Context(TypedDict):
     user: str
@@ -13,7 +19,24 @@ class Context(TypedDict):
     steps: Annotated[List[str], add]
     next_action: str
     messages: Annotated[List[dict], add]
-    
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Palantir MCP tools over streamable HTTP")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MCP_WORKERS", str(os.cpu_count() or 1))),
+                        help="Worker processes accepting connections on the same port")
+    args = parser.parse_args()
+    if args.workers > 1 and not os.getenv("SHARED_STATE_PATH"):
+        # Workers share the OAuth token, the metadata cache, streaming cursors,
+        # result cache invalidations and their metrics through this file.
+        os.environ["SHARED_STATE_PATH"] = os.path.join(os.path.expanduser("~"), ".cache", "palantir_mcp", "shared.sqlite3")
+    print(f"Starting server on {args.host}:{args.port} with {args.workers} workers...")
+    if args.workers > 1:
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
+
 if __name__ == "__main__":
-    print("Starting server...")
-    mcp.run(transport="streamable-http", host="0.0.0.0", port=8000)
\ No newline at end of file
+    main()
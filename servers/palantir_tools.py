@@ -1,14 +1,30 @@
-from mcp.server.fastmcp.server import FastMCP, Image
-from PIL import Image as PILImage
+from mcp.server.fastmcp.server import Context, FastMCP
 import httpx
-import pyodbc
 import os
-import requests
 from pydantic import BaseModel, Field
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Literal, Optional, Tuple
 import json
+import asyncio
+import contextlib
+import functools
+import hashlib
+import threading
+import time
 from dotenv import load_dotenv
 import logging
+import random
+import re
+import secrets
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlsplit
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -16,6 +32,56 @@ global mcp
 mcp = FastMCP("MyApp")
 endpoint = os.getenv("PALANTIR_ENDPOINT")
 ontology_id = os.getenv("ONTOLOGY_ID")
+http2_enabled = os.getenv("PALANTIR_HTTP2", "false").lower() == "true"
+http_limits = httpx.Limits(
+    max_connections=int(os.getenv("PALANTIR_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("PALANTIR_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.getenv("PALANTIR_KEEPALIVE_EXPIRY", "30")),
+)
+max_retries = int(os.getenv("PALANTIR_MAX_RETRIES", "5"))
+backoff_base = float(os.getenv("PALANTIR_BACKOFF_BASE", "0.5"))
+backoff_max = float(os.getenv("PALANTIR_BACKOFF_MAX", "30"))
+circuit_failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+circuit_reset_timeout = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+concurrency_initial = int(os.getenv("CONCURRENCY_INITIAL", "16"))
+concurrency_min = int(os.getenv("CONCURRENCY_MIN", "1"))
+concurrency_max = int(os.getenv("CONCURRENCY_MAX", "64"))
+metadata_cache_path = os.getenv("METADATA_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "palantir_mcp", "metadata.json"))
+metadata_cache_ttl = float(os.getenv("METADATA_CACHE_TTL", "86400"))
+# Caps the JSON-encoded size of the cached results, which is what the cache holds in memory.
+result_cache_max_bytes = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+result_cache_ttl = float(os.getenv("RESULT_CACHE_TTL", "60"))
+bulk_chunk_size = int(os.getenv("BULK_CHUNK_SIZE", "200"))
+bulk_concurrency = int(os.getenv("BULK_CONCURRENCY", "8"))
+coalesce_window = float(os.getenv("COALESCE_WINDOW", "0.5"))
+cursor_ttl = float(os.getenv("CURSOR_TTL", "600"))
+cursor_max = int(os.getenv("CURSOR_MAX", "1000"))
+aggregate_partitions = int(os.getenv("AGGREGATE_PARTITIONS", "8"))
+aggregate_concurrency = int(os.getenv("AGGREGATE_CONCURRENCY", "8"))
+export_page_size = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+export_max_file_bytes = int(os.getenv("EXPORT_MAX_FILE_BYTES", str(256 * 1024 * 1024)))
+export_row_group_rows = int(os.getenv("EXPORT_ROW_GROUP_ROWS", "50000"))
+export_root = os.getenv("EXPORT_ROOT", os.path.join(os.path.expanduser("~"), "palantir_exports"))
+batch_chunk_size = int(os.getenv("BATCH_CHUNK_SIZE", "20"))
+batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "4"))
+batch_max_retries = int(os.getenv("BATCH_MAX_RETRIES", "3"))
+shared_state_path = os.getenv("SHARED_STATE_PATH")
+traverse_max_depth = int(os.getenv("TRAVERSE_MAX_DEPTH", "5"))
+traverse_max_fanout = int(os.getenv("TRAVERSE_MAX_FANOUT", "100"))
+traverse_max_objects = int(os.getenv("TRAVERSE_MAX_OBJECTS", "1000"))
+traverse_concurrency = int(os.getenv("TRAVERSE_CONCURRENCY", "8"))
+sync_timestamp_property = os.getenv("SYNC_TIMESTAMP_PROPERTY")
+sync_limit = int(os.getenv("SYNC_LIMIT", "10000"))
+sync_state_path = os.getenv("SYNC_STATE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "palantir_mcp", "sync.sqlite3"))
+mirror_path = os.getenv("MIRROR_PATH", os.path.join(os.path.expanduser("~"), ".cache", "palantir_mcp", "mirror.sqlite3"))
+mirror_odbc_connection_string = os.getenv("MIRROR_ODBC_CONNECTION_STRING")
+mirror_object_types = [t.strip() for t in os.getenv("MIRROR_OBJECT_TYPES", "").split(",") if t.strip()]
+mirror_max_age = float(os.getenv("MIRROR_MAX_AGE", "3600"))
+mirror_max_objects = int(os.getenv("MIRROR_MAX_OBJECTS", "1000000"))
+http_timeout = httpx.Timeout(
+    float(os.getenv("PALANTIR_TIMEOUT", "30")),
+    connect=float(os.getenv("PALANTIR_CONNECT_TIMEOUT", "10")),
+)
 
 class ListObjectTypesParams(BaseModel):
     limit: int = Field(default=100, description="Maximum number of objects to return")
@@ -33,6 +99,9 @@ class ListObjectsParams(BaseModel):
     object_type_id: str = Field(..., description="ID of the object type to list Objects From")
     properties: Optional[List[str]] = Field(default=None, description="List of properties to include in the response")
     sort: Optional[Dict[str, Any]] = Field(default=None, description="Sorting criteria for the results")
+    stream: bool = Field(default=False, description="Return the first page with a cursor for fetch_next instead of every page up to limit")
+    format: Literal["rows", "columnar"] = Field(default="rows", description="rows returns one object per item, columnar returns property names once with one value array per property")
+    max_string_length: Optional[int] = Field(default=None, description="Truncate property string values longer than this many characters")
 
 class SearchObjectsParams(BaseModel):
     limit: int = Field(default=100, description="Maximum number of objects to return")
@@ -42,6 +111,14 @@ class SearchObjectsParams(BaseModel):
     properties: Optional[List[str]] = Field(default=None, description="List of properties to include in the response")
     sort: Optional[Dict[str, Any]] = Field(default=None, description="Sorting criteria for the results")
     query: List[Dict[str, Any]] = Field(..., description="Search query conditions")
+    stream: bool = Field(default=False, description="Return the first page with a cursor for fetch_next instead of every page up to limit")
+    format: Literal["rows", "columnar"] = Field(default="rows", description="rows returns one object per item, columnar returns property names once with one value array per property")
+    max_string_length: Optional[int] = Field(default=None, description="Truncate property string values longer than this many characters")
+    max_staleness: Optional[float] = Field(default=None, description="Answer from the local mirror only if it was loaded at most this many seconds ago, "
+                                           "MIRROR_MAX_AGE if omitted and 0 to always ask Palantir")
+
+class FetchNextParams(BaseModel):
+    cursor: str = Field(..., description="Cursor returned by a streaming list_objects or search_objects call")
 
 class AggregateObjectsParams(BaseModel):
     ontology: str = Field(default=ontology_id, description="Ontology to filter by")
@@ -49,12 +126,37 @@ class AggregateObjectsParams(BaseModel):
     groupby: Optional[List[Dict[str,Any]]] = Field(default=None, description="Property to group by")
     aggregation: List[Dict[str,Any]] = Field(default=None, description="Type of aggregation (e.g., count, sum, avg)")
     query: Optional[List[Dict[str, Any]]] = Field(default=None, description="Filter conditions for aggregation")
+    partition: Optional[Dict[str, Any]] = Field(default=None, description="Split the aggregation into concurrent range queries merged locally: "
+                                                "{\"field\": property, \"ranges\": [[start, end], ...]} or "
+                                                "{\"field\": property, \"start\": value, \"end\": value, \"partitions\": n} with numbers or ISO timestamps")
+    max_staleness: Optional[float] = Field(default=None, description="Answer from the local mirror only if it was loaded at most this many seconds ago, "
+                                           "MIRROR_MAX_AGE if omitted and 0 to always ask Palantir")
 
 class GetObjectParams(BaseModel):
     ontology: str = Field(default=ontology_id, description="Ontology to filter by")
     object_type_id: str = Field(..., description="ID of the object type to retrieve object from")
     primary_key: str = Field(..., description="Primary Key of the object to retrieve")
 
+class GetObjectsParams(BaseModel):
+    ontology: str = Field(default=ontology_id, description="Ontology to filter by")
+    object_type_id: str = Field(..., description="ID of the object type to retrieve objects from")
+    primary_keys: List[str] = Field(..., description="Primary Keys of the objects to retrieve")
+    properties: Optional[List[str]] = Field(default=None, description="List of properties to include in the response")
+    filter_type: Literal["in", "or"] = Field(default="in", description="Filter used to match a chunk of primary keys")
+    chunk_size: int = Field(default=bulk_chunk_size, description="Maximum number of primary keys per search request")
+
+class TraverseLinksParams(BaseModel):
+    ontology: str = Field(default=ontology_id, description="Ontology to filter by")
+    object_type_id: str = Field(..., description="ID of the object type the traversal starts from")
+    primary_keys: List[str] = Field(..., description="Primary Keys of the objects the traversal starts from")
+    links: List[str] = Field(..., description="Link type to follow at each hop, in order")
+    properties: Optional[List[Optional[List[str]]]] = Field(default=None, description="Properties to include for the objects reached at each hop, all properties for a missing or null entry")
+    max_fanout: int = Field(default=traverse_max_fanout, description="Maximum number of linked objects followed from one object")
+    max_objects: int = Field(default=traverse_max_objects, description="Maximum number of distinct objects returned over all hops")
+    concurrency: int = Field(default=traverse_concurrency, description="Maximum number of link requests in flight")
+    format: Literal["rows", "columnar"] = Field(default="rows", description="rows returns one object per item, columnar returns property names once with one value array per property")
+    max_string_length: Optional[int] = Field(default=None, description="Truncate property string values longer than this many characters")
+
 class ApplyActionParams(BaseModel):
     ontology: str = Field(default=ontology_id, description="Ontology to filter by")
     action_id: str = Field(..., description="ID of the action to apply")
@@ -64,54 +166,1645 @@ class ApplyBatchActionsParams(BaseModel):
     ontology: str = Field(default=ontology_id, description="Ontology to filter by")
     action_id: str = Field(..., description="ID of the action to apply")
     inputs: List[Dict[str, Any]] = Field(default=None, description="List of input parameters for the action")
+    chunk_size: int = Field(default=batch_chunk_size, description="Maximum number of inputs per applyBatch request")
+    concurrency: int = Field(default=batch_concurrency, description="Maximum number of applyBatch requests in flight")
+    max_retries: int = Field(default=batch_max_retries, description="Number of times a chunk is resent after 429, 503 or a failed connect, "
+                                                                 "which Palantir cannot have applied")
 
-def _get_token():
-    url = os.getenv("PALANTIR_SECURITY_ENDPOINT")
-    data = {
-       "grant_type" : "client_credentials",
-       "client_id" : os.getenv("CLIENT_ID"),
-       "client_secret":os.getenv("CLIENT_SECRET")
-    }
-    response = requests.post(url, data = data, verify=False)
-    bearer_token_response = json.loads(response.content.decode("utf-8"))
-    return bearer_token_response["access_token"]
+class ExportObjectsParams(BaseModel):
+    ontology: str = Field(default=ontology_id, description="Ontology to filter by")
+    object_type_id: str = Field(..., description="ID of the object type to export")
+    output_dir: str = Field(..., description="Directory under EXPORT_ROOT the export files and checkpoint are written to")
+    format: Literal["jsonl", "parquet"] = Field(default="jsonl", description="File format of the export")
+    properties: Optional[List[str]] = Field(default=None, description="List of properties to export, all properties if omitted")
+    query: Optional[List[Dict[str, Any]]] = Field(default=None, description="Search query conditions limiting the exported objects")
+    pagesize: int = Field(default=export_page_size, description="Number of items per page")
+    max_file_bytes: int = Field(default=export_max_file_bytes, description="Size at which the export rolls over to a new file")
+    resume: bool = Field(default=True, description="Resume from the checkpoint of an earlier export into the same directory")
+
+class SyncObjectsParams(BaseModel):
+    ontology: str = Field(default=ontology_id, description="Ontology to filter by")
+    object_type_id: str = Field(..., description="ID of the object type to sync")
+    timestamp_property: str = Field(default=sync_timestamp_property, description="Property holding the last modified timestamp of an object")
+    properties: Optional[List[str]] = Field(default=None, description="List of properties to include in the response")
+    query: Optional[List[Dict[str, Any]]] = Field(default=None, description="Search query conditions limiting the synced objects")
+    limit: int = Field(default=sync_limit, description="Maximum number of changed objects to return, the next call continues from there")
+    pagesize: int = Field(default=export_page_size, description="Number of items per page")
+    reset: bool = Field(default=False, description="Discard the stored watermark and sync every object again")
+    format: Literal["rows", "columnar"] = Field(default="rows", description="rows returns one object per item, columnar returns property names once with one value array per property")
+    max_string_length: Optional[int] = Field(default=None, description="Truncate property string values longer than this many characters")
+
+class MirrorObjectsParams(BaseModel):
+    ontology: str = Field(default=ontology_id, description="Ontology to filter by")
+    object_type_id: str = Field(..., description="ID of the object type to mirror")
+    properties: Optional[List[str]] = Field(default=None, description="List of properties to mirror, all properties if omitted")
+    indexes: Optional[List[str]] = Field(default=None, description="Properties to index, every mirrored scalar property if omitted")
+    auto_refresh: bool = Field(default=False, description="Reload the mirror in the background when a query finds it stale")
+    drop: bool = Field(default=False, description="Remove the mirror of the object type instead of loading it")
+
+class InvalidateMetadataCacheParams(BaseModel):
+    ontology: Optional[str] = Field(default=None, description="Ontology to invalidate, all ontologies if omitted")
+    object_type_id: Optional[str] = Field(default=None, description="Object type to invalidate, all object types of the ontology if omitted")
+
+class Metrics:
+    """In-process counters and latency histograms, rendered in the Prometheus text format.
+
+    Series are keyed by metric name and a sorted tuple of label pairs. Histograms
+    use fixed buckets so percentiles in ``snapshot`` are bucket upper bounds.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[tuple, float]] = dict()
+        self._histograms: Dict[str, Dict[tuple, list]] = dict()
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        series = self._counters.setdefault(name, dict())
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        series = self._histograms.setdefault(name, dict())
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = [[0] * len(self.BUCKETS), 0.0, 0]
+        for i, bound in enumerate(self.BUCKETS):
+            if value <= bound:
+                histogram[0][i] += 1
+                break
+        histogram[1] += value
+        histogram[2] += 1
+
+    def _quantile(self, histogram: list, q: float) -> Optional[float]:
+        rank, seen = q * histogram[2], 0
+        for bound, count in zip(self.BUCKETS, histogram[0]):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        def labels(key):
+            return ",".join(f"{k}={v}" for k, v in key) or "all"
+        counters = {name: {labels(k): v for k, v in series.items()} for name, series in self._counters.items()}
+        histograms = {name: {labels(k): {"count": h[2], "sum": round(h[1], 6), "mean": h[1] / h[2] if h[2] else 0.0,
+                                         "p50": self._quantile(h, 0.5), "p99": self._quantile(h, 0.99)}
+                             for k, h in series.items()}
+                      for name, series in self._histograms.items()}
+        return {"counters": counters, "histograms": histograms}
+
+    def export(self) -> dict:
+        """JSON-serializable copy of every series, for merging the metrics of several worker processes."""
+        return {
+            "counters": [[name, list(key), value] for name, series in self._counters.items() for key, value in series.items()],
+            "histograms": [[name, list(key), h] for name, series in self._histograms.items() for key, h in series.items()],
+        }
+
+    def merge(self, exported: dict):
+        """Add the series of another process's ``export`` to this registry."""
+        for name, key, value in exported["counters"]:
+            series = self._counters.setdefault(name, dict())
+            key = tuple(tuple(pair) for pair in key)
+            series[key] = series.get(key, 0.0) + value
+        for name, key, (buckets, total, count) in exported["histograms"]:
+            series = self._histograms.setdefault(name, dict())
+            histogram = series.setdefault(tuple(tuple(pair) for pair in key), [[0] * len(self.BUCKETS), 0.0, 0])
+            histogram[0] = [a + b for a, b in zip(histogram[0], buckets)]
+            histogram[1] += total
+            histogram[2] += count
+
+    def render(self, gauges: Optional[Dict[str, Dict[tuple, float]]] = None) -> str:
+        def labels(key, extra=()):
+            pairs = list(key) + list(extra)
+            if not pairs:
+                return ""
+            values = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+            return "{" + values + "}"
+        lines = []
+        for name, series in sorted(self._counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{labels(k)} {v:g}" for k, v in series.items())
+        for name, series in sorted(self._histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, (buckets, total, count) in series.items():
+                cumulative = 0
+                for bound, n in zip(self.BUCKETS, buckets):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{labels(key, [('le', f'{bound:g}')])} {cumulative}")
+                lines.append(f"{name}_bucket{labels(key, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{labels(key)} {total:g}")
+                lines.append(f"{name}_count{labels(key)} {count}")
+        for name, series in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{labels(k)} {v:g}" for k, v in series.items())
+        return "\n".join(lines) + "\n"
+
+_metrics = Metrics()
+
+@functools.lru_cache(maxsize=None)
+def _otel() -> Optional[Tuple[Any, Any]]:
+    """OpenTelemetry tracer and propagator, imported on first use; None when it is not installed."""
+    try:
+        from opentelemetry import propagate, trace
+    except ImportError:
+        return None
+    return trace.get_tracer(__name__), propagate
+
+def _span(name: str, **attributes):
+    """OpenTelemetry span when the SDK is installed, a no-op context otherwise."""
+    otel = _otel()
+    if otel is None:
+        return contextlib.nullcontext()
+    return otel[0].start_as_current_span(name, attributes=attributes)
+
+def _observed(fn):
+    """Record latency and outcome of a tool call and trace it as a span."""
+    name = fn.__name__
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = "error"
+        with _span(f"mcp.tool {name}", **{"mcp.tool.name": name}):
+            try:
+                result = await fn(*args, **kwargs)
+                status = "error" if isinstance(result, dict) and result.get("success") is False else "success"
+                return result
+            finally:
+                _metrics.observe("palantir_mcp_tool_duration_seconds", time.perf_counter() - start, tool=name, status=status)
+                _publish_metrics()
+    return wrapper
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared pooled client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        http2 = http2_enabled
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("PALANTIR_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+                http2 = False
+        _http_client = httpx.AsyncClient(limits=http_limits, timeout=http_timeout, http2=http2, verify=False)
+    return _http_client
+
+class SharedStore:
+    """Key-value store and leases in a local SQLite file, shared by the worker processes of one host.
+
+    Values are JSON documents grouped by namespace. A lease is held by at most
+    one process at a time until it is released or its ttl runs out, which lets
+    workers elect one of them to refresh shared state. SQLite serializes the
+    writers, so every operation is a single short statement.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.owner = f"{os.getpid()}:{secrets.token_hex(4)}"
+        self._connection: Optional["sqlite3.Connection"] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def connection(self) -> "sqlite3.Connection":
+        if self._connection is None or self._pid != os.getpid():
+            import sqlite3
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            os.chmod(self.path, 0o600)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS entries (namespace TEXT, key TEXT, value TEXT, PRIMARY KEY (namespace, key))")
+            connection.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires_at REAL)")
+            self._connection, self._pid = connection, os.getpid()
+            self.owner = f"{os.getpid()}:{secrets.token_hex(4)}"
+        return self._connection
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self.connection.execute("SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, namespace: str, key: str, value: Any):
+        self.connection.execute("INSERT OR REPLACE INTO entries (namespace, key, value) VALUES (?, ?, ?)",
+                                (namespace, key, json.dumps(value, default=str)))
+
+    def delete(self, namespace: str, keys: Optional[List[str]] = None, prefix: Optional[str] = None) -> int:
+        if keys is not None:
+            return sum(self.connection.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)).rowcount
+                       for key in keys)
+        if prefix is not None:
+            return self.connection.execute("DELETE FROM entries WHERE namespace = ? AND substr(key, 1, ?) = ?",
+                                           (namespace, len(prefix), prefix)).rowcount
+        return self.connection.execute("DELETE FROM entries WHERE namespace = ?", (namespace,)).rowcount
+
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        rows = self.connection.execute("SELECT key, value FROM entries WHERE namespace = ?", (namespace,)).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def delete_expired(self, namespace: str, field: str = "expires_at") -> int:
+        """Delete the values of a namespace whose ``field`` holds a wall-clock time in the past."""
+        return self.connection.execute("DELETE FROM entries WHERE namespace = ? AND json_extract(value, ?) < ?",
+                                       (namespace, f"$.{field}", time.time())).rowcount
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        now = time.time()
+        cursor = self.connection.execute(
+            "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE leases.expires_at < ? OR leases.owner = excluded.owner",
+            (name, self.owner, now + ttl, now))
+        return cursor.rowcount == 1
+
+    def release(self, name: str):
+        self.connection.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner))
+
+_shared_store = SharedStore(shared_state_path) if shared_state_path else None
+
+@contextlib.asynccontextmanager
+async def _leased(store: SharedStore, name: str, ttl: float = 60.0, timeout: float = 60.0):
+    """Hold a store lease for the duration of the block, renewing it until the block exits."""
+    deadline = time.monotonic() + timeout
+    while not store.acquire(name, ttl):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{name} is busy in another worker")
+        await asyncio.sleep(0.05)
+
+    async def renew():
+        while True:
+            await asyncio.sleep(ttl / 3)
+            store.acquire(name, ttl)
+
+    renewal = asyncio.create_task(renew())
+    try:
+        yield
+    finally:
+        renewal.cancel()
+        store.release(name)
+
+class TokenManager:
+    """Caches the client-credentials access token and refreshes it before it expires.
 
-def _get_headers():
-    token = _get_token()
+    Callers get the cached token straight away. Once the token is inside the
+    refresh margin a single background refresh is started, and callers keep
+    using the current token until it lands. Only when there is no usable token
+    at all do callers wait, and then only one of them talks to the auth server.
+    With a ``store`` the token is shared by all worker processes: one worker
+    holds the refresh lease and fetches, the others adopt what it stores.
+    """
+
+    def __init__(self, refresh_margin: float = 60.0, default_expires_in: float = 3600.0,
+                 store: Optional[SharedStore] = None, lease_ttl: float = 30.0):
+        self.refresh_margin = refresh_margin
+        self.default_expires_in = default_expires_in
+        self.store = store
+        self.lease_ttl = lease_ttl
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _fetch(self):
+        url = os.getenv("PALANTIR_SECURITY_ENDPOINT")
+        data = {
+           "grant_type" : "client_credentials",
+           "client_id" : os.getenv("CLIENT_ID"),
+           "client_secret":os.getenv("CLIENT_SECRET")
+        }
+        start = time.perf_counter()
+        with _span("palantir.token_refresh"):
+            try:
+                response = await _get_client().post(url, data = data)
+            finally:
+                _metrics.observe("palantir_mcp_token_refresh_seconds", time.perf_counter() - start)
+        _metrics.inc("palantir_mcp_token_refreshes_total", status=response.status_code)
+        bearer_token_response = _loads(response.content)
+        expires_in = float(bearer_token_response.get("expires_in") or self.default_expires_in)
+        self._token = bearer_token_response["access_token"]
+        self._expires_at = time.monotonic() + expires_in
+
+    def _adopt(self) -> bool:
+        """Use the token another worker stored if it is not due for refresh itself."""
+        shared = self.store.get("token", "access_token")
+        if not shared:
+            return False
+        remaining = shared["expires_at"] - time.time()
+        if remaining <= self.refresh_margin:
+            return False
+        self._token = shared["token"]
+        self._expires_at = time.monotonic() + remaining
+        return True
+
+    async def _refresh(self):
+        if self.store is None:
+            await self._fetch()
+            return
+        while not self.store.acquire("token", self.lease_ttl):
+            if self._adopt():
+                return
+            await asyncio.sleep(0.05)
+        try:
+            if not self._adopt():
+                await self._fetch()
+                self.store.put("token", "access_token",
+                               {"token": self._token, "expires_at": time.time() + self._expires_at - time.monotonic()})
+        finally:
+            self.store.release("token")
+
+    async def _background_refresh(self):
+        async with self._lock:
+            if time.monotonic() < self._expires_at - self.refresh_margin:
+                return
+            try:
+                await self._refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing token: {str(e)}")
+
+    async def get_token(self) -> str:
+        now = time.monotonic()
+        if self._token and now < self._expires_at:
+            if now >= self._expires_at - self.refresh_margin and not self._lock.locked() \
+                    and (self._refresh_task is None or self._refresh_task.done()):
+                self._refresh_task = asyncio.create_task(self._background_refresh())
+            return self._token
+        async with self._lock:
+            if not self._token or time.monotonic() >= self._expires_at:
+                await self._refresh()
+            return self._token
+
+    def invalidate(self):
+        if self.store is not None and self._token is not None:
+            shared = self.store.get("token", "access_token")
+            if shared and shared["token"] == self._token:
+                self.store.delete("token", keys=["access_token"])
+        self._token = None
+        self._expires_at = 0.0
+
+_token_manager = TokenManager(refresh_margin=float(os.getenv("TOKEN_REFRESH_MARGIN", "60")), store=_shared_store)
+
+async def _get_token():
+    return await _token_manager.get_token()
+
+def _loads(content: bytes) -> Any:
+    """Decode a JSON response body straight from bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value).encode("utf-8")
+
+def _encode_items(items: List[dict], format: str = "rows", max_string_length: Optional[int] = None) -> Tuple[Any, int]:
+    """Encode result objects for the MCP client.
+
+    ``rows`` keeps one dict per object; ``columnar`` sends the property names
+    once as ``columns`` and one value array per column. Property strings longer
+    than ``max_string_length`` are cut; ``__`` keys such as ``__primaryKey``
+    are kept whole so objects stay identifiable. Returns the encoded items and
+    how many values were truncated.
+    """
+    truncated = 0
+    if max_string_length is not None:
+        def cut(value):
+            nonlocal truncated
+            if isinstance(value, str) and len(value) > max_string_length:
+                truncated += 1
+                return value[:max_string_length]
+            return value
+        items = [{k: v if k.startswith("__") else cut(v) for k, v in item.items()} for item in items]
+    if format != "columnar":
+        return items, truncated
+    columns = list(dict.fromkeys(k for item in items for k in item))
+    return {"columns": columns, "values": [[item.get(c) for item in items] for c in columns]}, truncated
+
+async def _get_headers():
+    token = await _get_token()
     headers = {
         "Authorization": token,
         "Content-Type": "application/json"
     }
     return headers
 
-@mcp.tool()
-def list_object_types(params: ListObjectTypesParams):
+class PalantirAPIError(Exception):
+    """Non-success response from the Palantir API."""
 
-    """List Object Types from a given ontology."""
+    def __init__(self, response: httpx.Response):
+        self.status_code = response.status_code
+        super().__init__(f"HTTP {response.status_code}: {response.text[:500]}")
+
+class CircuitOpenError(Exception):
+    """Raised without calling the API while an endpoint's circuit is open."""
+
+class PartialResultError(Exception):
+    """A paginated pull failed after some pages; carries what was fetched and where to resume."""
+
+    def __init__(self, results: list, stats: dict, page_token: Optional[str], cause: Exception):
+        self.results = results
+        self.stats = stats
+        self.page_token = page_token
+        self.cause = cause
+        super().__init__(str(cause))
+
+def _raise_for_status(response: httpx.Response) -> httpx.Response:
+    if not response.is_success:
+        raise PalantirAPIError(response)
+    return response
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial request through after ``reset_timeout``."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
 
+    def end_trial(self):
+        """Let the next trial through when this one ended without an outcome, e.g. it was cancelled or never sent."""
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class AIMDLimiter:
+    """Adaptive concurrency limit: additive increase on success, halved when the API throttles."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, decrease_interval: float = 1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < max(self.minimum, int(self.limit)))
+            self.in_flight += 1
+
+    def release(self, throttled: bool):
+        """Give a slot back; synchronous so it also completes in a request that is being cancelled."""
+        self.in_flight -= 1
+        if throttled:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.decrease_interval:
+                self.limit = max(float(self.minimum), self.limit / 2)
+                self._last_decrease = now
+        else:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+        asyncio.ensure_future(self._notify())
+
+    async def _notify(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+_RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+_UNSENT_STATUS = (429, 503)
+_breakers: Dict[str, CircuitBreaker] = dict()
+_limiter = AIMDLimiter(concurrency_initial, concurrency_min, concurrency_max)
+
+def _endpoint_key(method: str, url: str) -> str:
+    """Group URLs by ontology resource, e.g. ``POST api/v2/ontologies/<o>/objects/search``."""
+    parts = urlsplit(url).path.strip("/").split("/")
+    if "ontologies" in parts:
+        i = parts.index("ontologies")
+        key = parts[:i + 3]
+        if len(parts) > i + 3 and parts[-1] in ("search", "aggregate", "apply", "applyBatch"):
+            key.append(parts[-1])
+        parts = key
+    return f"{method} {'/'.join(parts)}"
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
     try:
-        api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objectTypes"
-        headers = _get_headers()
-        parameters = dict()
-        parameters["pageSize"] = params.pagesize
-        results = []
-        while len(results)<params.limit:
-            response = requests.get(api_endpoint, headers=headers, params=parameters, verify=False)
-            response_json = json.loads(response.content.decode("utf-8"))
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except Exception:
+            return None
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+
+async def _request(method: str, url: str, timeout: Optional[float] = None, headers: Optional[dict] = None,
+                   idempotent: bool = True, retries: Optional[int] = None, **kwargs) -> httpx.Response:
+    """Send an authenticated request to the Palantir API on the shared client.
+
+    Throttling and transient failures are retried with jittered exponential
+    backoff, honoring ``Retry-After``. Requests that are not idempotent are
+    only retried when the API cannot have processed them (429, 503 or a failed
+    connect). Every request passes the endpoint's circuit breaker and the
+    adaptive concurrency limiter. Other responses are returned as they are.
+    ``retries`` overrides PALANTIR_MAX_RETRIES for one call.
+    """
+    key = _endpoint_key(method, url)
+    breaker = _breakers.setdefault(key, CircuitBreaker(circuit_failure_threshold, circuit_reset_timeout))
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    if retries is None:
+        retries = max_retries
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {key}, retry in {circuit_reset_timeout:.0f}s")
+        trial = breaker.opened_at is not None
+        try:
+            request_headers = {**(await _get_headers()), **(headers or {})}
+            await _limiter.acquire()
+            start = time.perf_counter()
+            throttled = False
+            try:
+                with _span(f"palantir.http {key}", **{"http.method": method, "http.url": url, "retry.attempt": attempt}) as span:
+                    if span is not None:
+                        _otel()[1].inject(request_headers)
+                    response = await _get_client().request(method, url, headers=request_headers, **kwargs)
+                    if span is not None:
+                        span.set_attribute("http.status_code", response.status_code)
+                throttled = response.status_code in _UNSENT_STATUS
+            except httpx.TransportError as e:
+                _metrics.observe("palantir_mcp_upstream_duration_seconds", time.perf_counter() - start, endpoint=key)
+                _metrics.inc("palantir_mcp_upstream_requests_total", endpoint=key, status=type(e).__name__)
+                breaker.record_failure()
+                unsent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if attempt >= retries or not (idempotent or unsent):
+                    raise
+                delay = _backoff(attempt)
+                _metrics.inc("palantir_mcp_upstream_retries_total", endpoint=key, reason=type(e).__name__)
+            else:
+                status = response.status_code
+                _metrics.observe("palantir_mcp_upstream_duration_seconds", time.perf_counter() - start, endpoint=key)
+                _metrics.inc("palantir_mcp_upstream_requests_total", endpoint=key, status=status)
+                _metrics.inc("palantir_mcp_upstream_bytes_total", len(response.content), endpoint=key)
+                if status == 401 and attempt == 0:
+                    _token_manager.invalidate()
+                    attempt += 1
+                    continue
+                if status not in _RETRYABLE_STATUS or not (idempotent or status in _UNSENT_STATUS):
+                    breaker.record_success()
+                    return response
+                if status == 429:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+                if attempt >= retries:
+                    return response
+                retry_after = _retry_after(response)
+                delay = min(backoff_max, retry_after) if retry_after is not None else _backoff(attempt)
+                logger.warning(f"HTTP {status} from {key}, retrying in {delay:.2f}s")
+                _metrics.inc("palantir_mcp_upstream_retries_total", endpoint=key, reason=status)
+            finally:
+                _limiter.release(throttled)
+        finally:
+            if trial:
+                breaker.end_trial()
+        attempt += 1
+        await asyncio.sleep(delay)
+
+_NEXT_PAGE_TOKEN = re.compile(rb'"nextPageToken"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+async def _page_request(method: str, url: str, token: Optional[str], size: int, params: Optional[dict] = None, payload: Optional[dict] = None) -> httpx.Response:
+    """Request one page; GET endpoints take the page settings as query parameters, POST endpoints in the JSON body."""
+    if method == "GET":
+        request_params = dict(params or {})
+        request_params["pageSize"] = size
+        if token:
+            request_params["pageToken"] = token
+        response = await _request(method, url, params=request_params)
+    else:
+        body = dict(payload or {})
+        body["pageSize"] = size
+        if token:
+            body["pageToken"] = token
+        response = await _request(method, url, json=body)
+    _metrics.inc("palantir_mcp_pages_total", endpoint=_endpoint_key(method, url))
+    return response
+
+async def _paginate(method: str, url: str, limit: int, pagesize: int, params: Optional[dict] = None, payload: Optional[dict] = None,
+                    ctx: Optional[Context] = None):
+    """Collect up to ``limit`` items from a paged endpoint.
+
+    The next page token is scanned out of the raw body so page N+1 is already in
+    flight while page N is being decoded. Page sizes are planned against
+    ``limit`` so the last request only asks for what is still missing. When a
+    ``ctx`` is given a progress notification is sent after every page. Returns
+    the items and a ``{"pages", "bytes"}`` stats dict; if a page fails after
+    earlier pages succeeded, PartialResultError carries those items and the
+    token of the failed page.
+    """
+    stats = {"pages": 0, "bytes": 0}
+    results = []
+    planned = 0
+    if limit <= 0:
+        return results, stats
+
+    def fetch(token: Optional[str], size: int) -> asyncio.Task:
+        nonlocal planned
+        planned += size
+        return asyncio.create_task(_page_request(method, url, token, size, params, payload))
+
+    pending_token = None
+    pending = fetch(None, min(pagesize, limit))
+    try:
+        while pending is not None:
+            try:
+                response = _raise_for_status(await pending)
+            except Exception as e:
+                if stats["pages"]:
+                    raise PartialResultError(results[:limit], stats, pending_token, e) from e
+                raise
+            pending = None
+            content = response.content
+            stats["pages"] += 1
+            stats["bytes"] += len(content)
+            prefetched_token = None
+            match = _NEXT_PAGE_TOKEN.search(content)
+            if match and planned < limit:
+                prefetched_token = _loads(b'"' + match.group(1) + b'"')
+                pending, pending_token = fetch(prefetched_token, min(pagesize, limit - planned)), prefetched_token
+            response_json = _loads(content)
             results.extend(response_json["data"])
-            if "nextPageToken" in response_json:
-                parameters["pageToken"] = response_json["nextPageToken"]
+            next_token = response_json.get("nextPageToken")
+            if pending is not None and next_token != prefetched_token:
+                pending.cancel()
+                pending = None
+            if pending is None and next_token and len(results) < limit:
+                planned = len(results)
+                pending, pending_token = fetch(next_token, min(pagesize, limit - len(results))), next_token
+            if ctx is not None:
+                await ctx.report_progress(min(len(results), limit), limit if pending is not None else min(len(results), limit))
+    finally:
+        if pending is not None:
+            pending.cancel()
+    return results[:limit], stats
+
+class CursorStore:
+    """Server-side cursors for streaming list and search results.
+
+    A cursor keeps the request, the Palantir ``pageToken`` and how many items
+    are still owed, plus at most one prefetched page, so a client can walk a
+    large result with ``fetch_next`` while the server only holds one page.
+    With a shared ``store`` the cursor state is also written there after every
+    page, so any worker process can continue a cursor; a worker whose local
+    copy is behind the stored state discards its prefetched page.
+    """
+
+    def __init__(self, ttl: float, max_cursors: int, store: Optional[SharedStore] = None):
+        self.ttl = ttl
+        self.max_cursors = max_cursors
+        self.store = store
+        self._cursors: "OrderedDict[str, dict]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = dict()
+
+    def __len__(self) -> int:
+        return len(self._cursors)
+
+    def create(self, method: str, url: str, limit: int, pagesize: int, params: Optional[dict] = None, payload: Optional[dict] = None,
+               encoding: Optional[dict] = None, page_token: Optional[str] = None) -> str:
+        self._expire()
+        while len(self._cursors) >= self.max_cursors:
+            self.drop(next(iter(self._cursors)))
+        cursor_id = secrets.token_urlsafe(16)
+        self._cursors[cursor_id] = {
+            "method": method, "url": url, "params": params, "payload": payload,
+            "pageToken": page_token, "remaining": limit, "pagesize": pagesize,
+            "pages": 0, "bytes": 0, "prefetch": None, "expires_at": time.time() + self.ttl, "encoding": encoding or {},
+        }
+        self._save(cursor_id)
+        return cursor_id
+
+    def get(self, cursor_id: str) -> Optional[dict]:
+        self._expire()
+        cursor = self._cursors.get(cursor_id)
+        if self.store is None:
+            return cursor
+        stored = self.store.get("cursor", cursor_id)
+        if stored is None or stored["expires_at"] < time.time():
+            self.drop(cursor_id)
+            return None
+        if cursor is None or cursor["pages"] != stored["pages"]:
+            if cursor is not None and cursor["prefetch"] is not None:
+                self._discard(cursor["prefetch"])
+            cursor = self._cursors[cursor_id] = {**stored, "prefetch": None}
+        return cursor
+
+    def drop(self, cursor_id: str):
+        self._locks.pop(cursor_id, None)
+        cursor = self._cursors.pop(cursor_id, None)
+        if cursor and cursor["prefetch"] is not None:
+            self._discard(cursor["prefetch"])
+        if self.store is not None:
+            self.store.delete("cursor", keys=[cursor_id])
+
+    def _save(self, cursor_id: str):
+        if self.store is not None:
+            self.store.put("cursor", cursor_id, {k: v for k, v in self._cursors[cursor_id].items() if k != "prefetch"})
+
+    def _expire(self):
+        now = time.time()
+        for cursor_id in [k for k, v in self._cursors.items() if v["expires_at"] < now]:
+            self.drop(cursor_id)
+        if self.store is not None:
+            self.store.delete_expired("cursor")
+
+    @staticmethod
+    def _discard(task: asyncio.Task):
+        if task.done():
+            if not task.cancelled():
+                task.exception()
+        else:
+            task.cancel()
+
+    def _fetch(self, cursor: dict) -> asyncio.Task:
+        size = min(cursor["pagesize"], cursor["remaining"])
+        return asyncio.create_task(_page_request(cursor["method"], cursor["url"], cursor["pageToken"], size, cursor["params"], cursor["payload"]))
+
+    @contextlib.asynccontextmanager
+    async def _exclusive(self, cursor_id: str):
+        """Serialize page fetches of one cursor, within this process and, with a store, across workers."""
+        async with self._locks.setdefault(cursor_id, asyncio.Lock()):
+            if self.store is None:
+                yield
+                return
+            async with _leased(self.store, f"cursor:{cursor_id}"):
+                yield
+
+    async def next_page(self, cursor_id: str) -> Tuple[list, Optional[str], dict]:
+        """Return the next page, the cursor id (None once exhausted) and the cursor's totals.
+
+        Concurrent calls on one cursor are served one after another, each with its own page.
+        """
+        async with self._exclusive(cursor_id):
+            return await self._next_page(cursor_id)
+
+    async def _next_page(self, cursor_id: str) -> Tuple[list, Optional[str], dict]:
+        cursor = self.get(cursor_id)
+        if cursor is None:
+            raise KeyError(f"Unknown or expired cursor {cursor_id}")
+        task = cursor["prefetch"] or self._fetch(cursor)
+        cursor["prefetch"] = None
+        response = _raise_for_status(await task)
+        response_json = _loads(response.content)
+        items = response_json["data"][:cursor["remaining"]]
+        cursor["remaining"] -= len(items)
+        cursor["pageToken"] = response_json.get("nextPageToken")
+        cursor["pages"] += 1
+        cursor["bytes"] += len(response.content)
+        totals = {"pages": cursor["pages"], "bytes": cursor["bytes"], "remaining": cursor["remaining"]}
+        if cursor["pageToken"] and cursor["remaining"] > 0:
+            cursor["expires_at"] = time.time() + self.ttl
+            self._cursors.move_to_end(cursor_id)
+            self._save(cursor_id)
+            cursor["prefetch"] = self._fetch(cursor)
+            return items, cursor_id, totals
+        self.drop(cursor_id)
+        return items, None, totals
+
+_cursors = CursorStore(cursor_ttl, cursor_max, store=_shared_store)
+
+async def _stream_first_page(method: str, url: str, limit: int, pagesize: int, params: Optional[dict] = None, payload: Optional[dict] = None,
+                             encoding: Optional[dict] = None) -> dict:
+    cursor_id = _cursors.create(method, url, limit, pagesize, params=params, payload=payload, encoding=encoding)
+    try:
+        items, cursor_id, totals = await _cursors.next_page(cursor_id)
+    except BaseException:
+        _cursors.drop(cursor_id)
+        raise
+    encoded, truncated = _encode_items(items, **(encoding or {}))
+    return {
+            "success": True,
+            "message": f"Retrieved {len(items)} Objects",
+            "items": encoded,
+            "total": len(items),
+            "truncated": truncated,
+            "cursor": cursor_id,
+            "limit": limit,
+            "pageSize": pagesize,
+            **totals
+        }
+
+def _partial_response(error: PartialResultError, message: str, method: str, url: str, limit: int, pagesize: int,
+                      params: Optional[dict] = None, payload: Optional[dict] = None, encoding: Optional[dict] = None) -> dict:
+    """Return the pages fetched before a failure together with a cursor that resumes at the failed page."""
+    cursor_id = _cursors.create(method, url, limit - len(error.results), pagesize, params=params, payload=payload,
+                                encoding=encoding, page_token=error.page_token)
+    items, truncated = _encode_items(error.results, **(encoding or {}))
+    logger.error(f"{message} after {len(error.results)} Objects: {str(error.cause)}")
+    return {
+            "success": False,
+            "message": f"{message} after {len(error.results)} Objects: {str(error.cause)}. Resume with fetch_next",
+            "items": items,
+            "total": len(error.results),
+            "truncated": truncated,
+            "cursor": cursor_id,
+            "limit": limit,
+            "pageSize": pagesize,
+            **error.stats
+        }
+
+class MetadataCache:
+    """Object type schemas keyed by (ontology, object_type_id), persisted to a JSON file.
+
+    Entries older than ``ttl`` seconds are stale; stale entries that carry an
+    ETag or Last-Modified value are revalidated with a conditional request
+    instead of being refetched. The object type listing of an ontology is kept
+    under the object type id ``"*"``. With a ``store`` the entries live in the
+    shared store instead, so every worker process sees the same cache.
+    """
+
+    LISTING = "*"
+
+    def __init__(self, path: str, ttl: float, store: Optional[SharedStore] = None):
+        self.path = path
+        self.ttl = ttl
+        self.store = store
+        self._loaded: Optional[Dict[str, dict]] = None
+
+    @property
+    def _entries(self) -> Dict[str, dict]:
+        """Entries of the JSON file, read on first use so importing the server stays cheap."""
+        if self._loaded is None:
+            self.load()
+        return self._loaded
+
+    @staticmethod
+    def _key(ontology: str, object_type_id: str) -> str:
+        return f"{ontology}::{object_type_id}"
+
+    def load(self):
+        if self.store is not None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._loaded = json.load(f).get("entries", {})
+        except FileNotFoundError:
+            self._loaded = {}
+        except Exception as e:
+            logger.error(f"Error loading metadata cache {self.path}: {str(e)}")
+            self._loaded = {}
+
+    def save(self):
+        if self.store is not None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self._entries}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving metadata cache {self.path}: {str(e)}")
+
+    def get(self, ontology: str, object_type_id: str) -> Optional[dict]:
+        if self.store is not None:
+            return self.store.get("metadata", self._key(ontology, object_type_id))
+        return self._entries.get(self._key(ontology, object_type_id))
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def put(self, ontology: str, object_type_id: str, value: Any, save: bool = True, **extra):
+        entry = {"value": value, "fetched_at": time.time(), **extra}
+        if self.store is not None:
+            self.store.put("metadata", self._key(ontology, object_type_id), entry)
+            return
+        self._entries[self._key(ontology, object_type_id)] = entry
+        if save:
+            self.save()
+
+    def touch(self, ontology: str, object_type_id: str):
+        entry = self.get(ontology, object_type_id)
+        if entry:
+            entry["fetched_at"] = time.time()
+            if self.store is not None:
+                self.store.put("metadata", self._key(ontology, object_type_id), entry)
+            self.save()
+
+    def invalidate(self, ontology: Optional[str] = None, object_type_id: Optional[str] = None) -> int:
+        if self.store is not None:
+            if ontology is None:
+                return self.store.delete("metadata")
+            if object_type_id is None:
+                return self.store.delete("metadata", prefix=f"{ontology}::")
+            return self.store.delete("metadata", keys=[self._key(ontology, object_type_id), self._key(ontology, self.LISTING)])
+        if ontology is None:
+            keys = list(self._entries)
+        elif object_type_id is None:
+            keys = [k for k in self._entries if k.startswith(f"{ontology}::")]
+        else:
+            keys = [self._key(ontology, object_type_id), self._key(ontology, self.LISTING)]
+        removed = 0
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                removed += 1
+        self.save()
+        return removed
+
+_metadata_cache = MetadataCache(metadata_cache_path, metadata_cache_ttl, store=_shared_store)
+
+async def _get_object_type_schema(ontology: str, object_type_id: str) -> Tuple[dict, bool]:
+    """Return the object type schema and whether it was served from the metadata cache."""
+    entry = _metadata_cache.get(ontology, object_type_id)
+    if entry and _metadata_cache.is_fresh(entry):
+        _metrics.inc("palantir_mcp_metadata_cache_total", result="hit")
+        return entry["value"], True
+    headers = dict()
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    api_endpoint = f"{endpoint}api/v2/ontologies/{ontology}/objectTypes/{object_type_id}"
+    response = await _request("GET", api_endpoint, headers=headers)
+    if response.status_code == 304 and entry:
+        _metadata_cache.touch(ontology, object_type_id)
+        _metrics.inc("palantir_mcp_metadata_cache_total", result="revalidated")
+        return entry["value"], True
+    _metrics.inc("palantir_mcp_metadata_cache_total", result="miss")
+    response_json = _loads(_raise_for_status(response).content)
+    if response.status_code == 200:
+        _metadata_cache.put(ontology, object_type_id, response_json,
+                            etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+    return response_json, False
+
+async def _cached_schema(ontology: str, object_type_id: str) -> Optional[dict]:
+    """Object type schema used to validate queries, or None when it cannot be read."""
+    try:
+        schema, _ = await _get_object_type_schema(ontology, object_type_id)
+        return schema if "properties" in schema else None
+    except Exception as e:
+        logger.warning(f"Error Retrieving {object_type_id} Object Type schema: {str(e)}")
+        return None
+
+class ResultCache:
+    """In-process LRU cache for object and query results with a TTL and a memory cap.
+
+    Keys are the normalized query payload. Values are held as JSON bytes and
+    decoded on every hit, so ``max_bytes`` caps the memory the values take and
+    callers never share mutable results. Entries remember their
+    (ontology, object_type_id) so actions can invalidate what they touch.
+    With a ``store`` an invalidation also publishes a new generation for the
+    object types, and every worker drops entries cached under an older one.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, store: Optional[SharedStore] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store = store
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(kind: str, ontology: str, object_type_id: str, payload: Any) -> str:
+        return json.dumps([kind, ontology, object_type_id, payload], sort_keys=True, default=str)
+
+    def generation(self, ontology: str, object_type_id: str) -> Optional[tuple]:
+        """Invalidation generation of an object type; read it before fetching what ``put`` stores."""
+        if self.store is None:
+            return None
+        return (self.store.get("generation", ontology), self.store.get("generation", f"{ontology}::{object_type_id}"))
+
+    def get(self, key: str) -> Optional[Any]:
+        """The decoded value cached under ``key``, or None."""
+        entry = self._entries.get(key)
+        if entry is not None and self.store is not None and entry[4] != self.generation(*entry[2]):
+            self._remove(key)
+            entry = None
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return _loads(entry[3])
+
+    def put(self, key: str, ontology: str, object_type_id: str, content: bytes, generation: Optional[tuple] = None):
+        """Cache a JSON-encoded value, e.g. a response body or ``_dumps`` of decoded results."""
+        size = len(content)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, (ontology, object_type_id), content, generation)
+        self.size += size
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.size -= entry[1]
+
+    def invalidate(self, ontology: str, object_type_ids: Optional[List[str]] = None) -> int:
+        if self.store is not None:
+            generation = secrets.token_hex(8)
+            for name in [ontology] if object_type_ids is None else [f"{ontology}::{o}" for o in object_type_ids]:
+                self.store.put("generation", name, generation)
+        keys = [k for k, v in self._entries.items()
+                if v[2][0] == ontology and (object_type_ids is None or v[2][1] in object_type_ids)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+        }
+
+_result_cache = ResultCache(result_cache_max_bytes, result_cache_ttl, store=_shared_store)
+
+async def _action_object_types(ontology: str, action_id: str) -> Optional[List[str]]:
+    """Object types an action type operates on, or None when they cannot be determined."""
+    cache_id = f"actionType:{action_id}"
+    entry = _metadata_cache.get(ontology, cache_id)
+    if entry and _metadata_cache.is_fresh(entry):
+        return entry["value"]
+    try:
+        api_endpoint = f"{endpoint}api/v2/ontologies/{ontology}/actionTypes/{action_id}"
+        response = await _request("GET", api_endpoint)
+        if response.status_code != 200:
+            return None
+        response_json = _loads(response.content)
+        object_types = sorted({v for operation in response_json.get("operations", [])
+                               for k, v in operation.items() if k.lower().endswith("objecttypeapiname") and v})
+        _metadata_cache.put(ontology, cache_id, object_types)
+        return object_types
+    except Exception as e:
+        logger.error(f"Error Retrieving {action_id} Action Type: {str(e)}")
+        return None
+
+class SingleFlight:
+    """Coalesces identical concurrent calls into one.
+
+    The first call for a key runs; calls with the same key that arrive while
+    it is in flight, or within ``window`` seconds after it succeeded, share
+    its result. Failed results are never reused.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._calls: Dict[str, Tuple[asyncio.Future, Optional[float]]] = dict()
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        entry = self._calls.get(key)
+        if entry is not None and (entry[1] is None or time.monotonic() < entry[1]):
+            self.shared += 1
+            return await asyncio.shield(entry[0])
+        if len(self._calls) > 1024:
+            self.forget_completed()
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = (future, None)
+        future.add_done_callback(functools.partial(self._done, key))
+        self.leaders += 1
+        return await asyncio.shield(future)
+
+    def _done(self, key: str, future: asyncio.Future):
+        if key not in self._calls or self._calls[key][0] is not future:
+            return
+        failed = future.cancelled() or future.exception() is not None \
+            or (isinstance(future.result(), dict) and future.result().get("success") is False)
+        if failed or self.window <= 0:
+            del self._calls[key]
+        else:
+            self._calls[key] = (future, time.monotonic() + self.window)
+
+    def forget_completed(self):
+        for key in [k for k, v in self._calls.items() if v[1] is not None]:
+            del self._calls[key]
+
+_single_flight = SingleFlight(coalesce_window)
+
+def _coalesce(tool_name: str, skip: Optional[Callable[[Any], bool]] = None):
+    """Share one upstream call among identical concurrent calls of a read-only tool."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            params = kwargs["params"] if "params" in kwargs else args[0]
+            if skip is not None and skip(params):
+                return await fn(*args, **kwargs)
+            key = json.dumps([tool_name, params.model_dump(mode="json")], sort_keys=True, default=str)
+            return await _single_flight.do(key, lambda: fn(*args, **kwargs))
+        return wrapper
+    return decorator
+
+_MIRROR_KINDS = {
+    "integer": "integer", "long": "integer", "short": "integer", "byte": "integer",
+    "double": "real", "float": "real", "decimal": "real", "boolean": "boolean",
+    "string": "text", "timestamp": "timestamp", "date": "text",
+}
+
+_MIRROR_SQL_TYPES = {
+    "sqlite": {"key": "TEXT", "integer": "INTEGER", "real": "REAL", "boolean": "INTEGER", "text": "TEXT",
+               "timestamp": "TEXT", "json": "TEXT"},
+    "odbc": {"key": "VARCHAR(255)", "integer": "BIGINT", "real": "DOUBLE PRECISION", "boolean": "SMALLINT",
+             "text": "VARCHAR(4000)", "timestamp": "CHAR(27)", "json": "TEXT"},
+    "mssql": {"key": "NVARCHAR(255)", "integer": "BIGINT", "real": "FLOAT", "boolean": "BIT",
+              "text": "NVARCHAR(4000)", "timestamp": "CHAR(27)", "json": "NVARCHAR(MAX)"},
+}
+
+_SQL_COMPARISONS = {"eq": "=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+class MirrorUnsupportedError(Exception):
+    """A query uses an operator, property or option the local mirror cannot answer."""
+
+_SUB_MICROSECOND = re.compile(r"(\.\d{6})\d+")
+
+def _mirror_timestamp(value: Any) -> str:
+    """An ISO timestamp as fixed-precision UTC text, which sorts and compares in time order."""
+    try:
+        parsed = datetime.fromisoformat(_SUB_MICROSECOND.sub(r"\1", str(value)).replace("Z", "+00:00"))
+    except ValueError:
+        raise MirrorUnsupportedError(f"{value!r} is not an ISO timestamp")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _mirror_column(columns: Dict[str, str], field: str) -> str:
+    if columns.get(field, "json") == "json":
+        raise MirrorUnsupportedError(f"Property {field} is not mirrored as a queryable column")
+    return _quote_identifier(field)
+
+def _where_sql(where: dict, columns: Dict[str, str]) -> Tuple[str, list]:
+    """Translate a compiled ``where`` clause into a SQL condition and its parameters.
+
+    Comparisons are false for objects without the property, so ``not`` matches
+    them as the search API does.
+    """
+    kind = where["type"]
+    if kind in ("and", "or"):
+        parts = [_where_sql(c, columns) for c in where["value"]]
+        return "(" + f" {kind.upper()} ".join(sql for sql, _ in parts) + ")", [a for _, args in parts for a in args]
+    if kind == "not":
+        sql, args = _where_sql(where["value"], columns)
+        return f"(NOT {sql})", args
+    field, value = where.get("field"), where.get("value")
+    column = _mirror_column(columns, field)
+    if columns[field] == "timestamp" and kind in ("in", *_SQL_COMPARISONS):
+        value = [_mirror_timestamp(v) for v in value] if kind == "in" else _mirror_timestamp(value)
+    if kind == "isNull":
+        return f"({column} IS {'' if value else 'NOT '}NULL)", []
+    if kind in _SQL_COMPARISONS:
+        return f"({column} IS NOT NULL AND {column} {_SQL_COMPARISONS[kind]} ?)", [value]
+    if kind == "in":
+        if not value:
+            return "(1 = 0)", []
+        return f"({column} IS NOT NULL AND {column} IN ({', '.join('?' * len(value))}))", list(value)
+    if kind == "startsWith" and columns[field] == "text":
+        escaped = str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"({column} IS NOT NULL AND {column} LIKE ? ESCAPE '\\')", [escaped + "%"]
+    raise MirrorUnsupportedError(f"Filter {kind} on {field} is not supported by the mirror")
+
+def _mirror_value(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if kind == "json":
+        return _dumps(value).decode("utf-8")
+    if kind == "boolean":
+        return int(bool(value))
+    if kind == "timestamp":
+        return _mirror_timestamp(value)
+    return value
+
+class SQLMirror:
+    """Local SQL copies of selected object types that answer searches and aggregations offline.
+
+    Each mirrored object type is one table with a column per scalar property,
+    an index per requested property and every object as JSON, next to a row in
+    ``mirror_state`` recording when it was loaded. Tables live in a SQLite file,
+    or in any ODBC database when a connection string is configured. A reload
+    streams pages into a new table and swaps it in within one transaction, so
+    readers never see a partial load. Methods block and are called from worker threads, one
+    at a time per process.
+    """
+
+    def __init__(self, path: str, odbc_connection_string: Optional[str] = None):
+        self.path = path
+        self.odbc_connection_string = odbc_connection_string
+        self.dialect = "odbc" if odbc_connection_string else "sqlite"
+        self._connection: Any = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        """Whether anything may have been mirrored, without creating the SQLite file."""
+        return bool(self.odbc_connection_string) or self._connection is not None or os.path.exists(self.path)
+
+    @property
+    def connection(self) -> Any:
+        if self._connection is None or self._pid != os.getpid():
+            if self.odbc_connection_string:
+                try:
+                    import pyodbc
+                except ImportError:
+                    raise RuntimeError("An ODBC mirror requires the pyodbc package")
+                connection = pyodbc.connect(self.odbc_connection_string)
+                if "sql server" in connection.getinfo(pyodbc.SQL_DBMS_NAME).lower():
+                    self.dialect = "mssql"
             else:
-                break
-        if len(results)>params.limit:
-            results = results[:params.limit]
+                import sqlite3
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                connection = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+                os.chmod(self.path, 0o600)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA case_sensitive_like=ON")
+            self._connection, self._pid = connection, os.getpid()
+            if not self._table_exists("mirror_state"):
+                types = _MIRROR_SQL_TYPES[self.dialect]
+                connection.cursor().execute(
+                    f"CREATE TABLE mirror_state (table_name {types['key']} PRIMARY KEY, ontology {types['text']}, "
+                    f"object_type {types['text']}, loaded_at {types['real']}, row_count {types['integer']}, "
+                    f"columns {types['json']}, indexes {types['json']}, complete {types['integer']}, "
+                    f"auto_refresh {types['integer']}, stale {types['integer']})")
+                connection.commit()
+        return self._connection
+
+    def _table_exists(self, name: str) -> bool:
+        if self.dialect == "sqlite":
+            return self._connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+        return self._connection.cursor().tables(table=name, tableType="TABLE").fetchone() is not None
+
+    @staticmethod
+    def table_name(ontology: str, object_type_id: str) -> str:
+        return "mirror_" + hashlib.sha1(f"{ontology}::{object_type_id}".encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _state(row: tuple) -> dict:
+        table, ontology, object_type, loaded_at, rows, columns, indexes, complete, auto_refresh, stale = row
+        return {"table": table, "ontology": ontology, "objectTypeId": object_type, "loadedAt": loaded_at, "rows": rows,
+                "columns": json.loads(columns), "indexes": json.loads(indexes), "complete": bool(complete),
+                "autoRefresh": bool(auto_refresh), "stale": bool(stale)}
+
+    def state(self, ontology: str, object_type_id: str) -> Optional[dict]:
+        with self._lock:
+            cursor = self.connection.cursor()
+            row = cursor.execute("SELECT * FROM mirror_state WHERE table_name = ?", (self.table_name(ontology, object_type_id),)).fetchone()
+            self._connection.commit()
+        return self._state(tuple(row)) if row else None
+
+    def states(self) -> List[dict]:
+        with self._lock:
+            rows = self.connection.cursor().execute("SELECT * FROM mirror_state ORDER BY ontology, object_type").fetchall()
+            self._connection.commit()
+        return [self._state(tuple(row)) for row in rows]
+
+    def begin(self, ontology: str, object_type_id: str, columns: Dict[str, str]) -> str:
+        """Create the empty table a reload of the object type is written to, returning its name."""
+        loading = f"{self.table_name(ontology, object_type_id)}_load_{os.getpid()}"
+        with self._lock:
+            connection = self.connection
+            types = _MIRROR_SQL_TYPES[self.dialect]
+            cursor = connection.cursor()
+            if self._table_exists(loading):
+                cursor.execute(f"DROP TABLE {loading}")
+            definitions = ([f'"__primaryKey" {types["key"]} PRIMARY KEY']
+                           + [f"{_quote_identifier(name)} {types[kind]}" for name, kind in columns.items()]
+                           + [f'"__position" {types["integer"]}', f'"__object" {types["json"]}'])
+            cursor.execute(f"CREATE TABLE {loading} ({', '.join(definitions)})")
+            connection.commit()
+        return loading
+
+    def insert(self, loading: str, columns: Dict[str, str], objects: List[dict], position: int):
+        """Write one page to a table from ``begin``; an object listed twice keeps its last copy."""
+        rows = {str(obj["__primaryKey"]): (str(obj["__primaryKey"]), *[_mirror_value(obj.get(name), kind) for name, kind in columns.items()],
+                                           position + i, _dumps(obj).decode("utf-8"))
+                for i, obj in enumerate(objects)}
+        if not rows:
+            return
+        keys = list(rows)
+        with self._lock:
+            connection = self.connection
+            cursor = connection.cursor()
+            try:
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    cursor.execute(f'DELETE FROM {loading} WHERE "__primaryKey" IN ({", ".join("?" * len(chunk))})', chunk)
+                if self.dialect == "mssql":
+                    cursor.fast_executemany = True
+                cursor.executemany(f"INSERT INTO {loading} VALUES ({', '.join('?' * (len(columns) + 3))})", list(rows.values()))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+    def finish(self, ontology: str, object_type_id: str, loading: str, columns: Dict[str, str], indexes: List[str],
+               complete: bool, auto_refresh: bool) -> dict:
+        """Index a table from ``begin`` and swap it in for the current mirror of the object type."""
+        table = self.table_name(ontology, object_type_id)
+        with self._lock:
+            connection = self.connection
+            cursor = connection.cursor()
+            try:
+                suffix = secrets.token_hex(4)
+                for i, name in enumerate(indexes):
+                    cursor.execute(f"CREATE INDEX {table}_{suffix}_{i} ON {loading} ({_quote_identifier(name)})")
+                rows = cursor.execute(f"SELECT COUNT(*) FROM {loading}").fetchone()[0]
+                if self._table_exists(table):
+                    cursor.execute(f"DROP TABLE {table}")
+                if self.dialect == "mssql":
+                    cursor.execute(f"EXEC sp_rename '{loading}', '{table}'")
+                else:
+                    cursor.execute(f"ALTER TABLE {loading} RENAME TO {table}")
+                state = (table, ontology, object_type_id, time.time(), rows, json.dumps(columns), json.dumps(indexes),
+                         int(complete), int(auto_refresh), 0)
+                cursor.execute("DELETE FROM mirror_state WHERE table_name = ?", (table,))
+                cursor.execute(f"INSERT INTO mirror_state VALUES ({', '.join('?' * len(state))})", state)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        return self._state(state)
+
+    def abort(self, loading: str):
+        with self._lock:
+            if self._table_exists(loading):
+                self._connection.cursor().execute(f"DROP TABLE {loading}")
+                self._connection.commit()
+
+    def drop(self, ontology: str, object_type_id: str) -> bool:
+        table = self.table_name(ontology, object_type_id)
+        with self._lock:
+            connection = self.connection
+            existed = self._table_exists(table)
+            cursor = connection.cursor()
+            if existed:
+                cursor.execute(f"DROP TABLE {table}")
+            cursor.execute("DELETE FROM mirror_state WHERE table_name = ?", (table,))
+            connection.commit()
+        return existed
+
+    def mark_stale(self, ontology: str, object_type_ids: Optional[List[str]] = None) -> int:
+        """Flag mirrors an action may have changed so queries go to Palantir until they are reloaded."""
+        sql, args = "UPDATE mirror_state SET stale = 1 WHERE ontology = ?", [ontology]
+        if object_type_ids is not None:
+            if not object_type_ids:
+                return 0
+            sql += f" AND object_type IN ({', '.join('?' * len(object_type_ids))})"
+            args.extend(object_type_ids)
+        with self._lock:
+            cursor = self.connection.cursor()
+            cursor.execute(sql, args)
+            self._connection.commit()
+        return cursor.rowcount
+
+    def _select(self, sql: str, args: list, limit: Optional[int] = None) -> List[tuple]:
+        if limit is not None:
+            if self.dialect == "mssql":
+                sql, args = sql.replace("SELECT ", "SELECT TOP (?) ", 1), [limit] + args
+            else:
+                sql, args = f"{sql} LIMIT ?", args + [limit]
+        with self._lock:
+            rows = self.connection.cursor().execute(sql, args).fetchall()
+            self._connection.commit()
+        return [tuple(row) for row in rows]
+
+    def search(self, state: dict, payload: dict, limit: int) -> List[dict]:
+        """Objects matching a search payload, ordered and projected like the search endpoint returns them.
+
+        Ties and unordered searches keep the order the objects were listed in when the mirror was loaded.
+        """
+        columns = state["columns"]
+        select = payload.get("select")
+        if select and any(name not in columns for name in select) or not select and not state["complete"]:
+            raise MirrorUnsupportedError("The selected properties are not all mirrored")
+        sql, args = f'SELECT "__object" FROM {state["table"]}', []
+        if payload.get("where"):
+            condition, args = _where_sql(payload["where"], columns)
+            sql += f" WHERE {condition}"
+        order = list()
+        for spec in (payload.get("orderBy") or {}).get("fields", []):
+            column = _mirror_column(columns, spec["field"])
+            direction = "DESC" if str(spec.get("direction", "asc")).lower() == "desc" else "ASC"
+            order.append(f"CASE WHEN {column} IS NULL THEN 1 ELSE 0 END {direction}, {column} {direction}")
+        sql += " ORDER BY " + ", ".join(order + ['"__position"'])
+        items = [_loads(row[0]) for row in self._select(sql, args, limit)]
+        if select:
+            items = [{k: v for k, v in obj.items() if k.startswith("__") or k in select} for obj in items]
+        return items
+
+    def aggregate(self, state: dict, groupby: Optional[List[Dict[str, Any]]], aggregations: Optional[List[Dict[str, Any]]],
+                  where: Optional[dict]) -> List[dict]:
+        """Exact-group count, sum, min, max and avg of aggregations named by _named_aggregations."""
+        columns = state["columns"]
+        groups = list()
+        for group in groupby or []:
+            group_type, args = next(iter(group.items()))
+            if group_type != "exact":
+                raise MirrorUnsupportedError(f"{group_type} grouping is not supported by the mirror")
+            if columns.get(args[0]) == "timestamp":
+                raise MirrorUnsupportedError(f"Grouping by timestamp property {args[0]} is not supported by the mirror")
+            groups.append(args[0])
+        expressions = [_mirror_column(columns, field) for field in groups]
+        names = list()
+        for agg in aggregations:
+            agg_type, args = next(iter(agg.items()))
+            if agg_type == "count":
+                expressions.append("COUNT(*)")
+                names.append(args[0])
+                continue
+            if agg_type not in _MERGEABLE_AGGREGATIONS:
+                raise MirrorUnsupportedError(f"Aggregation {agg_type} is not supported by the mirror")
+            column = _mirror_column(columns, args[0])
+            if agg_type in ("sum", "avg") and columns[args[0]] not in ("integer", "real"):
+                raise MirrorUnsupportedError(f"Aggregation {agg_type} needs a numeric property, {args[0]} is {columns[args[0]]}")
+            if columns[args[0]] == "timestamp":
+                raise MirrorUnsupportedError(f"Aggregation {agg_type} of timestamp property {args[0]} is not supported by the mirror")
+            expressions.append(f"{agg_type.upper()}({column})")
+            names.append(args[1])
+        sql, args = f"SELECT {', '.join(expressions)} FROM {state['table']}", []
+        if where:
+            condition, args = _where_sql(where, columns)
+            sql += f" WHERE {condition}"
+        if groups:
+            sql += " GROUP BY " + ", ".join(expressions[:len(groups)])
+        results = list()
+        for row in self._select(sql, args):
+            group = {field: bool(value) if value is not None and columns[field] == "boolean" else value
+                     for field, value in zip(groups, row)}
+            metrics = [{"name": name, "value": value} for name, value in zip(names, row[len(groups):])]
+            results.append({"group": group, "metrics": metrics})
+        return results
+
+_mirror = SQLMirror(mirror_path, mirror_odbc_connection_string)
+_mirror_refreshes: Dict[str, asyncio.Task] = dict()
+
+async def _load_mirror(ontology: str, object_type_id: str, properties: Optional[List[str]] = None,
+                       indexes: Optional[List[str]] = None, auto_refresh: bool = False) -> dict:
+    schema, _ = await _get_object_type_schema(ontology, object_type_id)
+    schema_properties = schema.get("properties") or {}
+    _validate_properties(properties, schema)
+    _validate_properties(indexes, schema)
+    columns = {name: _MIRROR_KINDS.get(((schema_properties.get(name) or {}).get("dataType") or {}).get("type"), "json")
+               for name in properties or schema_properties}
+    if indexes is None:
+        indexes = [name for name, kind in columns.items() if kind != "json"]
+    unindexable = [name for name in indexes if columns.get(name, "json") == "json"]
+    if unindexable:
+        raise ValueError(f"Cannot index properties that are not mirrored as scalar columns: {', '.join(unindexable)}")
+    api_endpoint = f"{endpoint}api/v2/ontologies/{ontology}/objects/{object_type_id}"
+    request_params = {"select": properties} if properties else None
+    loading = await asyncio.to_thread(_mirror.begin, ontology, object_type_id, columns)
+    rows, pages, size = 0, 0, 0
+    state = None
+    pending = asyncio.create_task(_page_request("GET", api_endpoint, None, export_page_size, request_params))
+    try:
+        while pending is not None:
+            response = _raise_for_status(await pending)
+            pending = None
+            response_json = _loads(response.content)
+            data = response_json.get("data", [])
+            if rows + len(data) > mirror_max_objects:
+                raise ValueError(f"{object_type_id} has more than {mirror_max_objects} Objects, raise MIRROR_MAX_OBJECTS to mirror it")
+            next_token = response_json.get("nextPageToken")
+            if next_token:
+                pending = asyncio.create_task(_page_request("GET", api_endpoint, next_token, export_page_size, request_params))
+            await asyncio.to_thread(_mirror.insert, loading, columns, data, rows)
+            rows += len(data)
+            pages += 1
+            size += len(response.content)
+        state = await asyncio.to_thread(_mirror.finish, ontology, object_type_id, loading, columns, indexes, not properties, auto_refresh)
+    finally:
+        if pending is not None:
+            pending.cancel()
+        if state is None:
+            _mirror.abort(loading)
+    return {**state, "pages": pages, "bytes": size}
+
+def _log_mirror_refresh(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Error loading mirror: {str(task.exception())}")
+
+def _refresh_mirror(ontology: str, object_type_id: str, **options) -> asyncio.Task:
+    """Load an object type into the mirror, joining a load of the same object type already in flight."""
+    key = f"{ontology}::{object_type_id}"
+    task = _mirror_refreshes.get(key)
+    if task is None or task.done():
+        task = _mirror_refreshes[key] = asyncio.create_task(_load_mirror(ontology, object_type_id, **options))
+        task.add_done_callback(_log_mirror_refresh)
+    return task
+
+async def _fresh_mirror(ontology: str, object_type_id: str, max_staleness: Optional[float]) -> Optional[dict]:
+    """Mirror state of an object type if it is fresh enough to answer a query.
+
+    A missing or stale mirror of an object type listed in MIRROR_OBJECT_TYPES,
+    or loaded with auto_refresh, is reloaded in the background while the
+    query goes to Palantir.
+    """
+    if max_staleness is not None and max_staleness <= 0:
+        return None
+    if not _mirror.configured and object_type_id not in mirror_object_types:
+        return None
+    state = await asyncio.to_thread(_mirror.state, ontology, object_type_id)
+    max_age = mirror_max_age if max_staleness is None else max_staleness
+    if state is not None and not state["stale"] and time.time() - state["loadedAt"] <= max_age:
+        return state
+    if object_type_id in mirror_object_types or state and state["autoRefresh"]:
+        options = {"properties": None if state["complete"] else list(state["columns"]), "indexes": state["indexes"],
+                   "auto_refresh": True} if state else {}
+        _refresh_mirror(ontology, object_type_id, **options)
+    return None
+
+async def _mirror_query(tool: str, ontology: str, object_type_id: str, max_staleness: Optional[float], query: Callable[[dict], Any]) -> Optional[Any]:
+    """Run ``query`` against a fresh mirror in a worker thread, or return None so the caller asks Palantir."""
+    try:
+        state = await _fresh_mirror(ontology, object_type_id, max_staleness)
+        if state is None:
+            return None
+        result = await asyncio.to_thread(query, state)
+    except MirrorUnsupportedError as e:
+        logger.debug(f"Mirror of {object_type_id} cannot answer {tool}: {str(e)}")
+        _metrics.inc("palantir_mcp_mirror_queries_total", tool=tool, result="unsupported")
+        return None
+    except Exception as e:
+        logger.warning(f"Error querying the {object_type_id} mirror, asking Palantir instead: {str(e)}")
+        _metrics.inc("palantir_mcp_mirror_queries_total", tool=tool, result="error")
+        return None
+    _metrics.inc("palantir_mcp_mirror_queries_total", tool=tool, result="hit")
+    return result
+
+async def _invalidate_for_action(ontology: str, action_id: str) -> int:
+    _single_flight.forget_completed()
+    object_types = await _action_object_types(ontology, action_id)
+    if _mirror.configured:
+        try:
+            await asyncio.to_thread(_mirror.mark_stale, ontology, object_types)
+        except Exception as e:
+            logger.warning(f"Error marking mirrors stale after {action_id}: {str(e)}")
+    return _result_cache.invalidate(ontology, object_types)
+
+@mcp.tool()
+@_observed
+@_coalesce("list_object_types")
+async def list_object_types(params: ListObjectTypesParams):
+
+    """List Object Types from a given ontology."""
+
+    try:
+        entry = _metadata_cache.get(params.ontology, MetadataCache.LISTING)
+        if entry and _metadata_cache.is_fresh(entry) and (entry["complete"] or len(entry["value"]) >= params.limit):
+            results, stats, cached = entry["value"][:params.limit], {"pages": 0, "bytes": 0}, True
+        else:
+            api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objectTypes"
+            results, stats = await _paginate("GET", api_endpoint, params.limit, params.pagesize)
+            for object_type in results:
+                if object_type.get("apiName"):
+                    _metadata_cache.put(params.ontology, object_type["apiName"], object_type, save=False)
+            _metadata_cache.put(params.ontology, MetadataCache.LISTING, results, complete=len(results) < params.limit)
+            cached = False
         return {
                 "success": True,
                 "message": f"Retrieved {len(results)} Object Types",
                 "items": results,
                 "total": len(results),
                 "limit": params.limit,
-                "pageSize": params.pagesize
+                "pageSize": params.pagesize,
+                "pages": stats["pages"],
+                "bytes": stats["bytes"],
+                "cached": cached
             }
     except Exception as e:
         logger.error(f"Error listing Object Types: {str(e)}")
@@ -125,19 +1818,19 @@ def list_object_types(params: ListObjectTypesParams):
         }
 
 @mcp.tool()
-def get_object_type(params: GetObjectTypeParams):
+@_observed
+@_coalesce("get_object_type")
+async def get_object_type(params: GetObjectTypeParams):
 
     """Retrieve Object Type from a given ontology."""
 
     try:
-        api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objectTypes/{params.object_type_id}"
-        headers = _get_headers()
-        response = requests.get(api_endpoint, headers=headers, verify=False)
-        response_json = json.loads(response.content.decode("utf-8"))
+        response_json, cached = await _get_object_type_schema(params.ontology, params.object_type_id)
         return {
                 "success": True,
                 "message": f"Retrieved {response_json["displayName"]} Object Types",
-                "item": response_json
+                "item": response_json,
+                "cached": cached
             }
     except Exception as e:
         logger.error(f"Error Retrieving {params.object_type_id} Object Type: {str(e)}")
@@ -147,42 +1840,175 @@ def get_object_type(params: GetObjectTypeParams):
             "item": None,
         }
 
+@mcp.tool()
+@_observed
+async def invalidate_metadata_cache(params: InvalidateMetadataCacheParams):
+
+    """Invalidate cached Object Type metadata so it is fetched again from the ontology."""
+
+    try:
+        removed = _metadata_cache.invalidate(params.ontology, params.object_type_id)
+        return {
+                "success": True,
+                "message": f"Invalidated {removed} metadata cache entries",
+                "total": removed
+            }
+    except Exception as e:
+        logger.error(f"Error invalidating metadata cache: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Error invalidating metadata cache: {str(e)}",
+            "total": 0
+        }
+
+@mcp.tool()
+@_observed
+async def cache_stats():
+
+    """Report hit, miss and eviction counters of the result cache, compiled query plans and request coalescing, and the mirrored Object Types."""
+
+    plans = _compile_shape.cache_info()
+    return {
+            "success": True,
+            "message": "Retrieved cache statistics",
+            "item": {**_result_cache.stats(),
+                     "queryPlans": {"entries": plans.currsize, "hits": plans.hits, "misses": plans.misses},
+                     "coalescing": {"upstream": _single_flight.leaders, "shared": _single_flight.shared},
+                     "mirror": await asyncio.to_thread(_mirror.states) if _mirror.configured else []}
+        }
+
+
+def _gauges() -> Dict[str, Dict[tuple, float]]:
+    """Point-in-time values read from the caches, limiter and circuit breakers."""
+    cache = _result_cache.stats()
+    plans = _compile_shape.cache_info()
+    states = {"closed": 0, "half-open": 1, "open": 2}
+    return {
+        "palantir_mcp_result_cache_hits": {(): cache["hits"]},
+        "palantir_mcp_result_cache_misses": {(): cache["misses"]},
+        "palantir_mcp_result_cache_evictions": {(): cache["evictions"]},
+        "palantir_mcp_result_cache_bytes": {(): cache["bytes"]},
+        "palantir_mcp_result_cache_hit_ratio": {(): cache["hitRate"]},
+        "palantir_mcp_query_plan_cache_hits": {(): plans.hits},
+        "palantir_mcp_query_plan_cache_misses": {(): plans.misses},
+        "palantir_mcp_coalesced_calls": {(("role", "upstream"),): _single_flight.leaders, (("role", "shared"),): _single_flight.shared},
+        "palantir_mcp_concurrency_limit": {(): _limiter.limit},
+        "palantir_mcp_requests_in_flight": {(): _limiter.in_flight},
+        "palantir_mcp_circuit_state": {(("endpoint", key),): states[breaker.state] for key, breaker in _breakers.items()},
+        "palantir_mcp_open_cursors": {(): len(_cursors)},
+    }
+
+_metrics_published = 0.0
+
+def _publish_metrics(force: bool = False):
+    """Share this worker's metrics and gauges through the shared store, at most once a second unless forced."""
+    global _metrics_published
+    if _shared_store is None or not force and time.monotonic() - _metrics_published < 1.0:
+        return
+    _metrics_published = time.monotonic()
+    try:
+        gauges = [[name, list(key), value] for name, series in _gauges().items() for key, value in series.items()]
+        _shared_store.put("metrics", str(os.getpid()), {**_metrics.export(), "gauges": gauges})
+    except Exception as e:
+        logger.warning(f"Error publishing metrics: {str(e)}")
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _worker_metrics() -> Tuple[Metrics, Dict[str, Dict[tuple, float]]]:
+    """Metrics summed over the worker processes sharing SHARED_STATE_PATH, and their gauges labelled by worker pid.
+
+    Counters of workers that have exited stay in the sums so they never go
+    backwards; their gauges are left out.
+    """
+    if _shared_store is None:
+        return _metrics, _gauges()
+    _publish_metrics(force=True)
+    merged = Metrics()
+    gauges: Dict[str, Dict[tuple, float]] = dict()
+    for pid, exported in _shared_store.items("metrics"):
+        merged.merge(exported)
+        if not _process_alive(int(pid)):
+            continue
+        for name, key, value in exported.get("gauges", []):
+            gauges.setdefault(name, dict())[tuple(tuple(pair) for pair in key) + (("worker", pid),)] = value
+    return merged, gauges
+
+@mcp.tool()
+@_observed
+async def server_stats():
+
+    """Report tool latencies, upstream request, page, byte and retry counts, token refresh timings and cache hit rates.
+
+    With several worker processes the counters are summed over all of them and gauges are reported per worker.
+    """
+
+    metrics, gauges = _worker_metrics()
+    gauges = {name: {",".join(f"{k}={v}" for k, v in key) or "all": value for key, value in series.items()}
+              for name, series in gauges.items()}
+    return {
+            "success": True,
+            "message": "Retrieved server statistics",
+            "item": {**metrics.snapshot(), "gauges": gauges, "tracing": _otel() is not None}
+        }
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint, served next to the MCP endpoint by the HTTP transports."""
+    metrics, gauges = _worker_metrics()
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
 @mcp.tool()      
-def list_objects(params: ListObjectsParams):
+@_observed
+@_coalesce("list_objects", skip=lambda p: p.stream)
+async def list_objects(params: ListObjectsParams, ctx: Context = None):
 
     """List Objects from a given Object Type."""
 
     try:
         api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objects/{params.object_type_id}"
-        headers = _get_headers()
+        schema = await _cached_schema(params.ontology, params.object_type_id)
+        plan = _construct_filter_query([], params.properties, params.sort, params.pagesize, schema)
         parameters = dict()
-        parameters["pageSize"] = params.pagesize
-        if params.properties:
-            parameters["select"] = params.properties
-        if params.sort:
-            orderby = [f"p.{k}:{v}" for k,v in params.sort.items() if k in params.properties or not params.properties]
-            parameters["orderBy"] = ",".join(orderby)
-        results = []
-        while len(results)<params.limit:
-            response = requests.get(api_endpoint, headers=headers, params=parameters, verify=False)
-            response_json = json.loads(response.content.decode("utf-8"))
-            
-            if response_json.get("data"):
-                results.extend(response_json["data"])
-            if "nextPageToken" in response_json:
-                parameters["pageToken"] = response_json["nextPageToken"]
-            else:
-                break
-        if len(results)>params.limit:
-            results = results[:params.limit]
+        if "select" in plan:
+            parameters["select"] = plan["select"]
+        if "orderBy" in plan:
+            parameters["orderBy"] = ",".join(f"p.{o['field']}:{o['direction']}" for o in plan["orderBy"]["fields"])
+        if params.stream:
+            return await _stream_first_page("GET", api_endpoint, params.limit, params.pagesize, params=parameters,
+                                            encoding={"format": params.format, "max_string_length": params.max_string_length})
+        cache_key = ResultCache.make_key("list", params.ontology, params.object_type_id,
+                                         {**plan, "limit": params.limit})
+        cached = _result_cache.get(cache_key)
+        if cached is None:
+            generation = _result_cache.generation(params.ontology, params.object_type_id)
+            results, stats = await _paginate("GET", api_endpoint, params.limit, params.pagesize, params=parameters, ctx=ctx)
+            _result_cache.put(cache_key, params.ontology, params.object_type_id, _dumps([results, stats]), generation)
+        else:
+            results, stats = cached
+        items, truncated = _encode_items(results, params.format, params.max_string_length)
         return {
                 "success": True,
                 "message": f"Retrieved {len(results)} Objects",
-                "items": results,
+                "items": items,
                 "total": len(results),
+                "format": params.format,
+                "truncated": truncated,
                 "limit": params.limit,
-                "pageSize": params.pagesize
+                "pageSize": params.pagesize,
+                "pages": stats["pages"],
+                "bytes": stats["bytes"],
+                "cached": cached is not None
             }
+    except PartialResultError as e:
+        return _partial_response(e, "Error listing Objects", "GET", api_endpoint, params.limit, params.pagesize, params=parameters,
+                                 encoding={"format": params.format, "max_string_length": params.max_string_length})
     except Exception as e:
         logger.error(f"Error listing Objects: {str(e)}")
         return {
@@ -195,19 +2021,28 @@ def list_objects(params: ListObjectsParams):
         } 
 
 @mcp.tool()  
-def get_object(params: GetObjectParams):
+@_observed
+@_coalesce("get_object")
+async def get_object(params: GetObjectParams):
 
     """Retrieve Object from a given Object Type."""
 
     try:
-        api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objectTypes/{params.object_type_id}/{params.primary_key}"
-        headers = _get_headers()
-        response = requests.get(api_endpoint, headers=headers, verify=False)
-        response_json = json.loads(response.content.decode("utf-8"))
+        api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objects/{params.object_type_id}/{params.primary_key}"
+        cache_key = ResultCache.make_key("object", params.ontology, params.object_type_id, params.primary_key)
+        response_json = _result_cache.get(cache_key)
+        cached = response_json is not None
+        if not cached:
+            generation = _result_cache.generation(params.ontology, params.object_type_id)
+            response = _raise_for_status(await _request("GET", api_endpoint))
+            response_json = _loads(response.content)
+            if response.status_code == 200:
+                _result_cache.put(cache_key, params.ontology, params.object_type_id, response.content, generation)
         return {
                 "success": True,
                 "message": f"Retrieved {response_json["__primaryKey"]} Object",
-                "item": response_json
+                "item": response_json,
+                "cached": cached
             }
     except Exception as e:
         logger.error(f"Error Retrieving {params.primary_key} Object: {str(e)}")
@@ -217,39 +2052,214 @@ def get_object(params: GetObjectParams):
             "item": None,
         }
 
-def _non_boolean_query_conditions(conditions:dict)->dict:
-    query=dict()
-    query["type"] = list(conditions.keys())[0]
-    query["field"] = (list(conditions.values())[0])[0]
-    query["value"] = (list(conditions.values())[0])[1]
-    return query
+@mcp.tool()
+@_observed
+@_coalesce("get_objects")
+async def get_objects(params: GetObjectsParams):
 
-def _boolean_query_conditions(conditions:dict)->dict:
-    query=dict()
-    query["type"] = list(conditions.keys())[0]
-    query["value"] = list()
-    values = list(conditions.values())[0]
-    for v in values:
-        if list(v.keys())[0] in ["and","or","not"]:
-            query["value"].append(_boolean_query_conditions(v))
-        else:
-            query["value"].append(_non_boolean_query_conditions(v))
-    return query
+    """Retrieve many Objects from a given Object Type by Primary Key."""
+
+    try:
+        api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objects/{params.object_type_id}/search"
+        primary_keys = list(dict.fromkeys(params.primary_keys))
+        schema, _ = await _get_object_type_schema(params.ontology, params.object_type_id)
+        primary_key_field = schema["primaryKey"]
+        chunk_size = max(1, params.chunk_size)
+        semaphore = asyncio.Semaphore(bulk_concurrency)
+
+        async def fetch_chunk(chunk: List[str]):
+            if params.filter_type == "in":
+                condition = {"in": [primary_key_field, chunk]}
+            else:
+                condition = {"or": [{"eq": [primary_key_field, k]} for k in chunk]}
+            payload = _construct_filter_query([condition], params.properties, {}, None, schema)
+            async with semaphore:
+                return await _paginate("POST", api_endpoint, len(chunk), len(chunk), payload=payload)
+
+        chunks = [primary_keys[i:i + chunk_size] for i in range(0, len(primary_keys), chunk_size)]
+        responses = await asyncio.gather(*[fetch_chunk(chunk) for chunk in chunks])
+        found = dict()
+        pages, size = 0, 0
+        for results, stats in responses:
+            pages += stats["pages"]
+            size += stats["bytes"]
+            for obj in results:
+                found[str(obj.get("__primaryKey"))] = obj
+        items = [found[k] for k in primary_keys if k in found]
+        missing = [k for k in primary_keys if k not in found]
+        return {
+                "success": True,
+                "message": f"Retrieved {len(items)} of {len(primary_keys)} Objects",
+                "items": items,
+                "missing": missing,
+                "total": len(items),
+                "requests": len(chunks),
+                "pages": pages,
+                "bytes": size
+            }
+    except Exception as e:
+        logger.error(f"Error Retrieving Objects: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Error Retrieving Objects: {str(e)}",
+            "items": [],
+            "missing": list(dict.fromkeys(params.primary_keys)),
+            "total": 0
+        }
 
-def _construct_filter_query(conditions: List[Dict[str, Any]],properties:list,sort:Dict,pagesize:int) -> dict:
+async def _link_target_type(ontology: str, object_type_id: str, link_type: str) -> str:
+    """Object type a link type of ``object_type_id`` points to."""
+    cache_id = f"linkType:{object_type_id}.{link_type}"
+    entry = _metadata_cache.get(ontology, cache_id)
+    if entry and _metadata_cache.is_fresh(entry):
+        return entry["value"]
+    api_endpoint = f"{endpoint}api/v2/ontologies/{ontology}/objectTypes/{object_type_id}/outgoingLinkTypes/{link_type}"
+    response_json = _loads(_raise_for_status(await _request("GET", api_endpoint)).content)
+    _metadata_cache.put(ontology, cache_id, response_json["objectTypeApiName"])
+    return response_json["objectTypeApiName"]
+
+@mcp.tool()
+@_observed
+@_coalesce("traverse_links")
+async def traverse_links(params: TraverseLinksParams):
+
+    """Follow a sequence of links from a set of Objects and return the reached Objects as a graph."""
+
+    try:
+        if len(params.links) > traverse_max_depth:
+            raise ValueError(f"{len(params.links)} hops exceed the traversal depth budget of {traverse_max_depth}")
+        projections = list(params.properties or [])
+        projections += [None] * (len(params.links) - len(projections))
+        object_types = [params.object_type_id]
+        for hop, link in enumerate(params.links):
+            object_types.append(await _link_target_type(params.ontology, object_types[-1], link))
+            _validate_properties(projections[hop], await _cached_schema(params.ontology, object_types[-1]))
+        semaphore = asyncio.Semaphore(max(1, params.concurrency))
+        max_fanout = max(1, params.max_fanout)
+        visited = {(params.object_type_id, pk) for pk in params.primary_keys}
+        frontier = list(dict.fromkeys(params.primary_keys))
+        hops, errors = list(), list()
+        requests, pages, size, total = 0, 0, 0, 0
+
+        async def expand(source_type: str, primary_key: str, link: str, select: Optional[List[str]]):
+            api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objects/{source_type}/{quote(primary_key, safe='')}/links/{link}"
+            async with semaphore:
+                try:
+                    results, stats = await _paginate("GET", api_endpoint, max_fanout, max_fanout, params={"select": select} if select else None)
+                    return results, stats, None
+                except PartialResultError as e:
+                    return e.results, e.stats, str(e.cause)
+                except Exception as e:
+                    return [], {"pages": 0, "bytes": 0}, str(e)
+
+        for hop, link in enumerate(params.links):
+            source_type, target_type = object_types[hop], object_types[hop + 1]
+            responses = await asyncio.gather(*[expand(source_type, pk, link, projections[hop]) for pk in frontier])
+            requests += len(frontier)
+            objects, edges, next_frontier, truncated = list(), list(), list(), False
+            for primary_key, (results, stats, error) in zip(frontier, responses):
+                pages += stats["pages"]
+                size += stats["bytes"]
+                if error is not None:
+                    errors.append({"objectType": source_type, "primaryKey": primary_key, "link": link, "error": error})
+                truncated = truncated or len(results) >= max_fanout
+                for obj in results:
+                    target = str(obj.get("__primaryKey"))
+                    if (target_type, target) not in visited:
+                        if total >= params.max_objects:
+                            truncated = True
+                            continue
+                        visited.add((target_type, target))
+                        objects.append(obj)
+                        next_frontier.append(target)
+                        total += 1
+                    edges.append([primary_key, target])
+            items, _ = _encode_items(objects, params.format, params.max_string_length)
+            hops.append({"link": link, "objectType": target_type, "items": items, "edges": edges, "truncated": truncated})
+            frontier = next_frontier
+            if not frontier:
+                break
+        return {
+                "success": not errors,
+                "message": f"Reached {total} Objects over {len(hops)} hops" + (f" with {len(errors)} failed link requests" if errors else ""),
+                "hops": hops,
+                "errors": errors,
+                "total": total,
+                "format": params.format,
+                "truncated": any(h["truncated"] for h in hops),
+                "requests": requests,
+                "pages": pages,
+                "bytes": size
+            }
+    except Exception as e:
+        logger.error(f"Error traversing links: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Error traversing links: {str(e)}",
+            "hops": [],
+            "total": 0
+        }
+
+_BOOLEAN_OPERATORS = ("and", "or", "not")
+
+def _query_shape(condition: dict, values: list) -> tuple:
+    """Split a condition into a hashable shape and its values, collected depth first."""
+    operator, operand = next(iter(condition.items()))
+    if operator in _BOOLEAN_OPERATORS:
+        return (operator, tuple(_query_shape(c, values) for c in operand))
+    values.append(operand[1] if len(operand) > 1 else None)
+    return (operator, operand[0])
+
+def _shape_fields(shape: tuple) -> set:
+    operator, operand = shape
+    if operator in _BOOLEAN_OPERATORS:
+        return set().union(*[_shape_fields(c) for c in operand])
+    return {operand}
+
+@functools.lru_cache(maxsize=1024)
+def _compile_shape(shape: tuple) -> Callable[[Iterator[Any]], dict]:
+    """Compile a query shape once into a builder that fills in the values of each call."""
+    operator, operand = shape
+    if operator in _BOOLEAN_OPERATORS:
+        children = [_compile_shape(c) for c in operand]
+        if operator == "not":
+            child = children[0] if len(children) == 1 else _compile_shape(("and", operand))
+            return lambda values: {"type": operator, "value": child(values)}
+        return lambda values: {"type": operator, "value": [c(values) for c in children]}
+    return lambda values: {"type": operator, "field": operand, "value": next(values)}
+
+def _validate_properties(names, schema: Optional[dict]):
+    if not schema or not names:
+        return
+    known = schema.get("properties") or {}
+    unknown = sorted(n for n in names if n not in known and not n.startswith("__"))
+    if unknown:
+        raise ValueError(f"Unknown properties for Object Type {schema.get('apiName')}: {', '.join(unknown)}")
+
+def _compile_where(conditions: List[Dict[str, Any]], schema: Optional[dict] = None) -> Optional[dict]:
+    """Compile query conditions into a ``where`` clause, combining several with an implicit and."""
+    if not conditions:
+        return None
+    values = list()
+    shapes = tuple(_query_shape(c, values) for c in conditions)
+    shape = shapes[0] if len(shapes) == 1 else ("and", shapes)
+    _validate_properties(_shape_fields(shape), schema)
+    return _compile_shape(shape)(iter(values))
+
+def _construct_filter_query(conditions: List[Dict[str, Any]],properties:list,sort:Dict,pagesize:int,schema:Optional[dict]=None) -> dict:
     query = dict()
     if pagesize:
         query["pageSize"] = pagesize
     if properties and len(properties)>0:
+        _validate_properties(properties, schema)
         query["select"] = properties
     if sort:
-        orderby = [{"field":k,"direction":v} for k,v in sort.items() if k in properties or not properties or len(properties)==0]
+        _validate_properties(sort.keys(), schema)
+        orderby = [{"field":k,"direction":v} for k,v in sort.items() if not properties or k in properties]
         query["orderBy"] = {"fields":orderby}
-    for condition in conditions:
-        if list(condition.keys())[0] in ["and","or","not"]:
-            query["where"] = _boolean_query_conditions(condition)
-        else:
-            query["where"] = _non_boolean_query_conditions(condition)
+    where = _compile_where(conditions, schema)
+    if where is not None:
+        query["where"] = where
     return query
 
 def _construct_aggregation_query(aggregations: List[Dict[str, Any]]):
@@ -291,40 +2301,180 @@ def _construct_groupby_query(groupby: List[Dict[str, Any]]):
             continue
     return query
 
+_MERGEABLE_AGGREGATIONS = ("count", "sum", "min", "max", "avg")
+
+def _named_aggregations(aggregations: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Give every aggregation an explicit metric name, a count when there are none.
+
+    Partitioned and mirrored aggregations are computed locally, so the names
+    are chosen here rather than by the server to keep every path's answer alike.
+    """
+    named = list()
+    for agg in aggregations or [{"count": []}]:
+        agg_type, args = next(iter(agg.items()))
+        args = list(args or [])
+        if agg_type == "count":
+            named.append({agg_type: args[:1] or ["count"]})
+        else:
+            named.append({agg_type: args[:2] if len(args) > 1 else [args[0], f"{agg_type}_{args[0]}"]})
+    return named
+
+def _partition_bounds(partition: Dict[str, Any]) -> List[Tuple[Any, Any, bool]]:
+    """Split a partition spec into (start, end, end_inclusive) bounds."""
+    if partition.get("ranges"):
+        return [(r[0], r[1], False) for r in partition["ranges"]]
+    start, end = partition["start"], partition["end"]
+    count = max(1, int(partition.get("partitions", aggregate_partitions)))
+    if isinstance(start, str):
+        first, last = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        step = (last - first) / count
+        edges = [start] + [(first + step * i).isoformat().replace("+00:00", "Z") for i in range(1, count)] + [end]
+    elif isinstance(start, int) and isinstance(end, int):
+        edges = [start + (end - start) * i // count for i in range(count)] + [end]
+    else:
+        edges = [start + (end - start) * i / count for i in range(count)] + [end]
+    return [(edges[i], edges[i + 1], i == count - 1) for i in range(count) if edges[i] != edges[i + 1] or i == count - 1]
+
+def _partitioned_aggregations(aggregations: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str, List[str]]], Dict[str, str]]:
+    """Rewrite aggregations named by _named_aggregations into mergeable per-partition metrics.
+
+    Returns the aggregations to send for every partition, per requested
+    metric its output name, type and the partition metric names it is merged
+    from, and per averaged property the name of a count of the objects where
+    it is not null. avg is sent as a sum and divided by that count after
+    merging, since the count aggregation also counts objects without a value.
+    """
+    internal = list()
+    metrics = list()
+    non_null: Dict[str, str] = dict()
+    for i, agg in enumerate(aggregations):
+        agg_type, args = next(iter(agg.items()))
+        if agg_type not in _MERGEABLE_AGGREGATIONS:
+            raise ValueError(f"Aggregation {agg_type} cannot be merged across partitions")
+        if agg_type == "count":
+            internal.append({"count": [f"__{i}_count"]})
+            metrics.append((args[0], agg_type, [f"__{i}_count"]))
+        elif agg_type == "avg":
+            internal.append({"sum": [args[0], f"__{i}_sum"]})
+            count = non_null.setdefault(args[0], f"__{len(non_null)}_non_null_count")
+            metrics.append((args[1], agg_type, [f"__{i}_sum", count]))
+        else:
+            internal.append({agg_type: [args[0], f"__{i}_{agg_type}"]})
+            metrics.append((args[1], agg_type, [f"__{i}_{agg_type}"]))
+    return internal, metrics, non_null
+
+def _merge_aggregations(responses: List[dict], metrics: List[Tuple[str, str, List[str]]]) -> List[dict]:
+    buckets: Dict[str, dict] = dict()
+    for response_json in responses:
+        for item in response_json.get("data", []):
+            group = item.get("group", {})
+            bucket = buckets.setdefault(json.dumps(group, sort_keys=True, default=str), {"group": group, "values": {}})
+            for metric in item.get("metrics", []):
+                name, value = metric["name"], metric.get("value")
+                if value is None:
+                    continue
+                previous = bucket["values"].get(name)
+                if previous is None:
+                    bucket["values"][name] = value
+                elif name.endswith(("_count", "_sum")):
+                    bucket["values"][name] = previous + value
+                elif name.endswith("_min"):
+                    bucket["values"][name] = min(previous, value)
+                else:
+                    bucket["values"][name] = max(previous, value)
+    results = list()
+    for bucket in buckets.values():
+        merged = list()
+        for name, agg_type, sources in metrics:
+            if agg_type == "avg":
+                total, count = bucket["values"].get(sources[0]), bucket["values"].get(sources[1])
+                value = total / count if total is not None and count else None
+            else:
+                value = bucket["values"].get(sources[0])
+            merged.append({"name": name, "value": value})
+        results.append({"group": bucket["group"], "metrics": merged})
+    return results
+
+async def _aggregate_partitioned(api_endpoint: str, params: "AggregateObjectsParams", schema: Optional[dict]) -> Tuple[List[dict], dict]:
+    field = params.partition["field"]
+    _validate_properties([field], schema)
+    internal, metrics, non_null = _partitioned_aggregations(params.aggregation)
+    payload = dict()
+    if params.groupby and len(params.groupby)>0:
+        payload["groupBy"] = _construct_groupby_query(params.groupby)["groupBy"]
+    semaphore = asyncio.Semaphore(aggregate_concurrency)
+
+    async def run(start: Any, end: Any, end_inclusive: bool, aggregations: List[Dict[str, Any]], extra: List[Dict[str, Any]]) -> dict:
+        conditions = list(params.query or []) + [{"gte": [field, start]}, {"lte" if end_inclusive else "lt": [field, end]}] + extra
+        body = {**payload, "aggregation": _construct_aggregation_query(aggregations)["aggregations"],
+                "where": _compile_where(conditions, schema)}
+        async with semaphore:
+            response = await _request("POST", api_endpoint, json=body)
+        return _loads(_raise_for_status(response).content)
+
+    bounds = _partition_bounds(params.partition)
+    counts = [({"count": [name]}, {"isNull": [averaged, False]}) for averaged, name in non_null.items()]
+    responses, count_responses = await asyncio.gather(
+        asyncio.gather(*[run(*b, internal, []) for b in bounds]),
+        asyncio.gather(*[run(*b, [count], [condition]) for b in bounds for count, condition in counts]))
+    details = {
+        "partitions": len(bounds),
+        "excludedItems": sum(r.get("excludedItems", 0) or 0 for r in responses),
+        "accuracy": "ACCURATE" if all(r.get("accuracy", "ACCURATE") == "ACCURATE" for r in responses) else "APPROXIMATE",
+    }
+    return _merge_aggregations(responses + count_responses, metrics), details
+
 @mcp.tool()
-def search_objects(params: SearchObjectsParams):
+@_observed
+@_coalesce("search_objects", skip=lambda p: p.stream)
+async def search_objects(params: SearchObjectsParams, ctx: Context = None):
 
     """Search Objects from a given Object Type."""
     try:
         api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objects/{params.object_type_id}/search"
-        headers = _get_headers()
         if not params.properties:
             params.properties = list()
         if not params.sort:
             params.sort = dict()
-        payload = _construct_filter_query(params.query,params.properties,params.sort,params.pagesize)
-        print(payload)
-        results = []
-        while len(results)<params.limit:
-            response = requests.post(api_endpoint, headers=headers, json=payload, verify=False)
-            response_json = json.loads(response.content.decode("utf-8"))
-            
-            if response_json.get("data"):
-                results.extend(response_json["data"])
-            if "nextPageToken" in response_json:
-                payload["pageToken"] = response_json["nextPageToken"]
+        schema = await _cached_schema(params.ontology, params.object_type_id)
+        payload = _construct_filter_query(params.query,params.properties,params.sort,params.pagesize,schema)
+        logger.debug(f"Search payload: {payload}")
+        if params.stream:
+            return await _stream_first_page("POST", api_endpoint, params.limit, params.pagesize, payload=payload,
+                                            encoding={"format": params.format, "max_string_length": params.max_string_length})
+        cached = None
+        results = await _mirror_query("search_objects", params.ontology, params.object_type_id, params.max_staleness,
+                                      lambda state: _mirror.search(state, payload, params.limit))
+        mirrored = results is not None
+        if mirrored:
+            stats = {"pages": 0, "bytes": 0}
+        else:
+            cache_key = ResultCache.make_key("search", params.ontology, params.object_type_id, {**payload, "limit": params.limit})
+            cached = _result_cache.get(cache_key)
+            if cached is None:
+                generation = _result_cache.generation(params.ontology, params.object_type_id)
+                results, stats = await _paginate("POST", api_endpoint, params.limit, params.pagesize, payload=payload, ctx=ctx)
+                _result_cache.put(cache_key, params.ontology, params.object_type_id, _dumps([results, stats]), generation)
             else:
-                break
-        if len(results)>params.limit:
-            results = results[:params.limit]
+                results, stats = cached
+        items, truncated = _encode_items(results, params.format, params.max_string_length)
         return {
                 "success": True,
                 "message": f"Retrieved {len(results)} Objects",
-                "items": results,
+                "items": items,
                 "total": len(results),
+                "format": params.format,
+                "truncated": truncated,
                 "limit": params.limit,
-                "pageSize": params.pagesize
+                "pageSize": params.pagesize,
+                "pages": stats["pages"],
+                "bytes": stats["bytes"],
+                "cached": cached is not None,
+                "mirrored": mirrored
             }
+    except PartialResultError as e:
+        return _partial_response(e, "Error searching Objects", "POST", api_endpoint, params.limit, params.pagesize, payload=payload,
+                                 encoding={"format": params.format, "max_string_length": params.max_string_length})
     except Exception as e:
         logger.error(f"Error searching Objects: {str(e)}")
         return {
@@ -335,27 +2485,75 @@ def search_objects(params: SearchObjectsParams):
         }
 
 @mcp.tool()
-def aggregate_objects(params: AggregateObjectsParams):
+@_observed
+async def fetch_next(params: FetchNextParams):
+
+    """Fetch the next page of a streaming list_objects or search_objects call."""
+
+    try:
+        cursor = _cursors.get(params.cursor)
+        encoding = cursor["encoding"] if cursor else {}
+        items, cursor_id, totals = await _cursors.next_page(params.cursor)
+        encoded, truncated = _encode_items(items, **encoding)
+        return {
+                "success": True,
+                "message": f"Retrieved {len(items)} Objects",
+                "items": encoded,
+                "total": len(items),
+                "truncated": truncated,
+                "cursor": cursor_id,
+                **totals
+            }
+    except Exception as e:
+        logger.error(f"Error fetching next page for cursor {params.cursor}: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Error fetching next page for cursor {params.cursor}: {str(e)}",
+            "items": [],
+            "total": 0,
+            "cursor": params.cursor
+        }
+
+@mcp.tool()
+@_observed
+@_coalesce("aggregate_objects")
+async def aggregate_objects(params: AggregateObjectsParams):
 
     """Aggregate Objects from a given Object Type."""
 
     try:
         api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objects/{params.object_type_id}/aggregate"
-        headers = _get_headers()
+        params.aggregation = _named_aggregations(params.aggregation)
+        if params.partition:
+            schema = await _cached_schema(params.ontology, params.object_type_id)
+            items, details = await _aggregate_partitioned(api_endpoint, params, schema)
+            return {
+                    "success": True,
+                    "message": f"Aggregated {len(items)} Objects",
+                    "items": items,
+                    "total": len(items),
+                    **details
+                }
         payload = dict()
         if params.groupby and len(params.groupby)>0:
             payload["groupBy"] = _construct_groupby_query(params.groupby)["groupBy"]
         if params.aggregation and len(params.aggregation)>0:
             payload["aggregation"] = _construct_aggregation_query(params.aggregation)["aggregations"]
         if params.query and len(params.query)>0:
-            payload["where"] = _construct_filter_query(params.query,[],{},None)["where"]
-        response = requests.post(api_endpoint, headers=headers, json=payload, verify=False)
-        response_json = json.loads(response.content.decode("utf-8"))
+            schema = await _cached_schema(params.ontology, params.object_type_id)
+            payload["where"] = _compile_where(params.query, schema)
+        items = await _mirror_query("aggregate_objects", params.ontology, params.object_type_id, params.max_staleness,
+                                    lambda state: _mirror.aggregate(state, params.groupby, params.aggregation, payload.get("where")))
+        mirrored = items is not None
+        if not mirrored:
+            response = _raise_for_status(await _request("POST", api_endpoint, json=payload))
+            items = _loads(response.content).get("data",[])
         return {
                 "success": True,
-                "message": f"Aggregated {len(response_json.get('data',[]))} Objects",
-                "items": response_json.get("data",[]),
-                "total": len(response_json.get("data",[]))
+                "message": f"Aggregated {len(items)} Objects",
+                "items": items,
+                "total": len(items),
+                "mirrored": mirrored
             }
     except Exception as e:
         logger.error(f"Error aggregating Objects: {str(e)}")
@@ -367,18 +2565,21 @@ def aggregate_objects(params: AggregateObjectsParams):
         }
 
 @mcp.tool()
-def apply_action(params: ApplyActionParams):
+@_observed
+async def apply_action(params: ApplyActionParams):
 
     """Apply Action on a given ontology"""
 
     try:
         api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/actions/{params.action_id}/apply"
-        headers = _get_headers()
         payload = dict()
         if params.inputs:
             payload["parameters"] = params.inputs
-        response = requests.post(api_endpoint, headers=headers, json=payload, verify=False)
-        response_json = json.loads(response.content.decode("utf-8"))
+        try:
+            response = _raise_for_status(await _request("POST", api_endpoint, json=payload, idempotent=False))
+        finally:
+            await _invalidate_for_action(params.ontology, params.action_id)
+        response_json = _loads(response.content)
         return {
                 "success": True,
                 "message": f"Applied Action {params.action_id}",
@@ -393,23 +2594,62 @@ def apply_action(params: ApplyActionParams):
         }
     
 @mcp.tool()
-def apply_batch_actions(params: ApplyBatchActionsParams):
+@_observed
+async def apply_batch_actions(params: ApplyBatchActionsParams):
 
     """Apply Batch Actions on a given ontology"""
 
     try:
         api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/actions/{params.action_id}/applyBatch"
-        headers = _get_headers()
-        payload = dict()
-        if params.inputs and len(params.inputs)>0:
-            payload["requests"] = [{"parameters":i} for i in params.inputs]
-        
-        response = requests.post(api_endpoint, headers=headers, json=payload, verify=False)
-        response_json = json.loads(response.content.decode("utf-8"))
+        inputs = params.inputs or []
+        chunk_size = max(1, params.chunk_size)
+        semaphore = asyncio.Semaphore(max(1, params.concurrency))
+        outcomes: Dict[int, Tuple[str, Optional[str]]] = dict()
+
+        async def submit(start: int):
+            """Send one chunk once; _request resends it only while Palantir cannot have applied it."""
+            chunk = inputs[start:start + chunk_size]
+            payload = dict()
+            payload["requests"] = [{"parameters":i} for i in chunk]
+            async with semaphore:
+                try:
+                    response = await _request("POST", api_endpoint, json=payload, idempotent=False, retries=max(0, params.max_retries))
+                except CircuitOpenError as e:
+                    outcomes[start] = ("failed", str(e))
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                    outcomes[start] = ("failed", f"{type(e).__name__}: {str(e)}")
+                except Exception as e:
+                    outcomes[start] = ("unknown", f"{type(e).__name__}: {str(e)}")
+                else:
+                    status = response.status_code
+                    if response.is_success:
+                        outcomes[start] = ("applied", None)
+                    elif status in _UNSENT_STATUS or status < 500 and status != 408:
+                        outcomes[start] = ("failed", f"HTTP {status}: {response.text[:500]}")
+                    else:
+                        outcomes[start] = ("unknown", f"HTTP {status}: {response.text[:500]}")
+
+        try:
+            await asyncio.gather(*[submit(start) for start in range(0, len(inputs), chunk_size)])
+        finally:
+            await _invalidate_for_action(params.ontology, params.action_id)
+        results = list()
+        for i in range(len(inputs)):
+            outcome, error = outcomes.get(i - i % chunk_size, ("unknown", "Request was cancelled"))
+            results.append({"index": i, "success": outcome == "applied", "outcome": outcome, "error": error})
+        failed = sum(1 for r in results if r["outcome"] == "failed")
+        unknown = sum(1 for r in results if r["outcome"] == "unknown")
+        message = f"Applied Batch Action {params.action_id} to {len(inputs) - failed - unknown} of {len(inputs)} inputs"
+        if unknown:
+            message += f", {unknown} inputs may or may not have been applied"
         return {
-                "success": True,
-                "message": f"Applied Batch Action {params.action_id}",
-                "items": response_json
+                "success": failed == 0 and unknown == 0,
+                "message": message,
+                "items": results,
+                "succeeded": len(inputs) - failed - unknown,
+                "failed": failed,
+                "unknown": unknown,
+                "requests": len(outcomes)
             }
     except Exception as e:
         logger.error(f"Error applying Batch Action {params.action_id}: {str(e)}")
@@ -419,6 +2659,363 @@ def apply_batch_actions(params: ApplyBatchActionsParams):
             "items": []
         }
     
+_ARROW_TYPES = {
+    "string": "string", "integer": "int32", "long": "int64", "short": "int16", "byte": "int8",
+    "double": "float64", "float": "float32", "boolean": "bool_",
+}
+
+class _JsonlExportWriter:
+    """Writes pages as JSON lines; a part can be resumed at any checkpointed byte offset."""
+
+    extension = "jsonl"
+    resumable_parts = True
+
+    def __init__(self, schema: Optional[dict], properties: Optional[List[str]]):
+        self._file = None
+
+    def open(self, path: str, offset: int):
+        mode = "r+b" if offset and os.path.exists(path) else "wb"
+        self._file = open(path, mode)
+        self._file.truncate(offset if mode == "r+b" else 0)
+        self._file.seek(0, os.SEEK_END)
+
+    def write(self, items: List[dict]):
+        self._file.write(b"".join(_dumps(item) + b"\n" for item in items))
+
+    def flush(self) -> int:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class _ParquetExportWriter:
+    """Writes pages to Parquet with column types taken from the object type schema.
+
+    A Parquet file is only readable once its footer is written, so a part can
+    only be resumed from its start; checkpoints therefore advance when a part
+    is closed.
+    """
+
+    extension = "parquet"
+    resumable_parts = False
+
+    def __init__(self, schema: Optional[dict], properties: Optional[List[str]]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires the pyarrow package (install the parquet extra)")
+        self._pa, self._pq = pa, pq
+        schema_properties = (schema or {}).get("properties") or {}
+        names = properties or list(schema_properties)
+        self._columns = [("__primaryKey", pa.string(), True)]
+        for name in names:
+            data_type = ((schema_properties.get(name) or {}).get("dataType") or {}).get("type")
+            if data_type == "timestamp":
+                self._columns.append((name, pa.timestamp("us", tz="UTC"), False))
+            elif data_type == "date":
+                self._columns.append((name, pa.date32(), False))
+            elif data_type in _ARROW_TYPES:
+                self._columns.append((name, getattr(pa, _ARROW_TYPES[data_type])(), data_type == "string"))
+            else:
+                self._columns.append((name, pa.string(), True))
+        self._schema = pa.schema([(name, arrow_type) for name, arrow_type, _ in self._columns])
+        self._file = None
+        self._writer = None
+        self._buffer: List[Any] = []
+        self._buffered_rows = 0
+
+    def open(self, path: str, offset: int):
+        self._file = open(path, "wb")
+        self._writer = self._pq.ParquetWriter(self._file, self._schema)
+
+    def write(self, items: List[dict]):
+        pa = self._pa
+        arrays = list()
+        for name, arrow_type, as_text in self._columns:
+            values = [item.get(name) for item in items]
+            if as_text:
+                values = [v if v is None or isinstance(v, str) else json.dumps(v) for v in values]
+                arrays.append(pa.array(values, type=pa.string()))
+            elif pa.types.is_timestamp(arrow_type):
+                try:
+                    arrays.append(pa.array(values, type=pa.string()).cast(arrow_type))
+                except pa.ArrowInvalid:
+                    # Fractions finer than the column's microseconds are cut off rather than failing the export.
+                    values = [v if v is None else _SUB_MICROSECOND.sub(r"\1", v) for v in values]
+                    arrays.append(pa.array(values, type=pa.string()).cast(arrow_type))
+            elif pa.types.is_date(arrow_type):
+                arrays.append(pa.array(values, type=pa.string()).cast(arrow_type))
+            else:
+                arrays.append(pa.array(values, type=arrow_type))
+        self._buffer.append(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+        self._buffered_rows += len(items)
+        if self._buffered_rows >= export_row_group_rows:
+            self._write_row_group()
+
+    def _write_row_group(self):
+        if self._buffer:
+            self._writer.write_table(self._pa.Table.from_batches(self._buffer, schema=self._schema))
+            self._buffer, self._buffered_rows = [], 0
+
+    def flush(self) -> int:
+        return self._file.tell() + sum(batch.nbytes for batch in self._buffer)
+
+    def close(self):
+        if self._writer is not None:
+            self._write_row_group()
+            self._writer.close()
+            self._file.close()
+            self._writer, self._file = None, None
+
+def _export_dir(output_dir: str, object_type_id: str) -> str:
+    """Resolve an export directory under EXPORT_ROOT, refusing paths and file names that escape it."""
+    if not object_type_id or ".." in object_type_id or any(c in object_type_id for c in ("/", "\\", "\0")):
+        raise ValueError(f"Invalid Object Type id for an export file name: {object_type_id!r}")
+    root = os.path.realpath(export_root)
+    path = os.path.realpath(os.path.join(root, output_dir))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"output_dir {output_dir} is outside EXPORT_ROOT {root}")
+    return path
+
+def _load_checkpoint(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _save_checkpoint(path: str, checkpoint: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+@mcp.tool()
+@_observed
+async def export_objects(params: ExportObjectsParams, ctx: Context = None):
+
+    """Export all Objects of a given Object Type to JSONL or Parquet files under EXPORT_ROOT."""
+
+    try:
+        output_dir = _export_dir(params.output_dir, params.object_type_id)
+        checkpoint_path = os.path.join(output_dir, f"{params.object_type_id}.checkpoint.json")
+        schema = await _cached_schema(params.ontology, params.object_type_id)
+        if params.query:
+            method, api_endpoint = "POST", f"{endpoint}api/v2/ontologies/{params.ontology}/objects/{params.object_type_id}/search"
+            request_params, payload = None, _construct_filter_query(params.query, params.properties, {}, None, schema)
+        else:
+            method, api_endpoint = "GET", f"{endpoint}api/v2/ontologies/{params.ontology}/objects/{params.object_type_id}"
+            _validate_properties(params.properties, schema)
+            request_params, payload = ({"select": params.properties} if params.properties else None), None
+        request = {"ontology": params.ontology, "objectType": params.object_type_id, "format": params.format,
+                   "properties": params.properties, "query": params.query}
+        checkpoint = _load_checkpoint(checkpoint_path) if params.resume else None
+        if checkpoint and checkpoint["request"] != request:
+            raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different export, rerun with resume=false")
+        resumed = checkpoint is not None
+        if checkpoint is None:
+            checkpoint = {"request": request, "pageToken": None, "part": 0, "offset": 0, "rows": 0, "files": [], "done": False}
+        if checkpoint["done"]:
+            return {
+                    "success": True,
+                    "message": f"Export of {params.object_type_id} already complete with {checkpoint['rows']} Objects",
+                    "files": checkpoint["files"],
+                    "rows": checkpoint["rows"],
+                    "pages": 0,
+                    "resumed": True
+                }
+        writer_class = _ParquetExportWriter if params.format == "parquet" else _JsonlExportWriter
+        writer = writer_class(schema, params.properties)
+        part_path = lambda part: os.path.join(output_dir, f"{params.object_type_id}-{part:05d}.{writer.extension}")
+        pages, size = 0, 0
+        pending = asyncio.create_task(_page_request(method, api_endpoint, checkpoint["pageToken"], params.pagesize, request_params, payload))
+        try:
+            while pending is not None:
+                response = _raise_for_status(await pending)
+                pending = None
+                if pages == 0:
+                    os.makedirs(output_dir, exist_ok=True)
+                    writer.open(part_path(checkpoint["part"]), checkpoint["offset"])
+                response_json = _loads(response.content)
+                next_token = response_json.get("nextPageToken")
+                if next_token:
+                    pending = asyncio.create_task(_page_request(method, api_endpoint, next_token, params.pagesize, request_params, payload))
+                await asyncio.to_thread(writer.write, response_json.get("data", []))
+                pages += 1
+                size += len(response.content)
+                checkpoint["rows"] += len(response_json.get("data", []))
+                checkpoint["pageToken"] = next_token
+                offset = await asyncio.to_thread(writer.flush)
+                rolled = offset >= params.max_file_bytes or not next_token
+                if rolled:
+                    await asyncio.to_thread(writer.close)
+                    checkpoint["files"].append(part_path(checkpoint["part"]))
+                    checkpoint["part"] += 1
+                    offset = 0
+                checkpoint["offset"] = offset
+                checkpoint["done"] = not next_token
+                if rolled or writer.resumable_parts:
+                    _save_checkpoint(checkpoint_path, checkpoint)
+                if rolled and next_token:
+                    writer.open(part_path(checkpoint["part"]), 0)
+                if ctx is not None:
+                    await ctx.report_progress(checkpoint["rows"])
+        finally:
+            if pending is not None:
+                pending.cancel()
+            writer.close()
+        return {
+                "success": True,
+                "message": f"Exported {checkpoint['rows']} Objects to {len(checkpoint['files'])} files",
+                "files": checkpoint["files"],
+                "rows": checkpoint["rows"],
+                "pages": pages,
+                "bytes": size,
+                "resumed": resumed
+            }
+    except Exception as e:
+        logger.error(f"Error exporting {params.object_type_id} Objects: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Error exporting {params.object_type_id} Objects: {str(e)}",
+            "files": [],
+            "rows": 0
+        }
+
+_sync_store = _shared_store or SharedStore(sync_state_path)
+_sync_locks: Dict[str, asyncio.Lock] = dict()
+
+def _changed_since(timestamp_property: str, primary_key_field: str, state: Optional[dict]) -> List[Dict[str, Any]]:
+    """Conditions matching objects modified after the watermark, or at it but not yet delivered."""
+    if not state:
+        return []
+    watermark = state["watermark"]
+    if not state["boundary"]:
+        return [{"gt": [timestamp_property, watermark]}]
+    return [{"or": [{"gt": [timestamp_property, watermark]},
+                    {"and": [{"eq": [timestamp_property, watermark]},
+                             {"not": [{"in": [primary_key_field, state["boundary"]]}]}]}]}]
+
+def _advance_watermark(state: Optional[dict], timestamp_property: str, results: List[dict]) -> Optional[dict]:
+    """Watermark after delivering ``results`` (sorted by timestamp) with the keys that share it."""
+    stamped = [obj for obj in results if obj.get(timestamp_property) is not None]
+    if not stamped:
+        return state
+    watermark = stamped[-1][timestamp_property]
+    boundary = [str(obj["__primaryKey"]) for obj in stamped if obj[timestamp_property] == watermark]
+    if state and state["watermark"] == watermark:
+        boundary = list(dict.fromkeys(state["boundary"] + boundary))
+    return {"watermark": watermark, "boundary": boundary}
+
+@mcp.tool()
+@_observed
+async def sync_objects(params: SyncObjectsParams, ctx: Context = None):
+
+    """Return the Objects changed since the last sync of an Object Type and advance its watermark.
+
+    Objects are fetched in timestamp order, so a call that stops at ``limit``
+    is continued by the next one. Objects sharing the watermark timestamp are
+    remembered and not delivered twice. Deleted Objects are not reported.
+    Syncs of one Object Type, from any worker, run one after another.
+    """
+
+    try:
+        if not params.timestamp_property:
+            raise ValueError("timestamp_property is required (or set SYNC_TIMESTAMP_PROPERTY)")
+        key = f"{params.ontology}::{params.object_type_id}"
+        async with _sync_locks.setdefault(key, asyncio.Lock()), _leased(_sync_store, f"sync:{key}", timeout=300.0):
+            state = None if params.reset else _sync_store.get("watermark", key)
+            if state and state.get("property") != params.timestamp_property:
+                state = None
+            schema, _ = await _get_object_type_schema(params.ontology, params.object_type_id)
+            properties = list(params.properties or [])
+            if properties and params.timestamp_property not in properties:
+                properties.append(params.timestamp_property)
+            conditions = _changed_since(params.timestamp_property, schema["primaryKey"], state) + list(params.query or [])
+            payload = _construct_filter_query(conditions, properties, {params.timestamp_property: "asc"}, params.pagesize,
+                                              schema if "properties" in schema else None)
+            api_endpoint = f"{endpoint}api/v2/ontologies/{params.ontology}/objects/{params.object_type_id}/search"
+            error = None
+            try:
+                results, stats = await _paginate("POST", api_endpoint, params.limit, params.pagesize, payload=payload, ctx=ctx)
+            except PartialResultError as e:
+                results, stats, error = e.results, e.stats, e.cause
+            new_state = _advance_watermark(state, params.timestamp_property, results)
+            if new_state is not None:
+                _sync_store.put("watermark", key, {**new_state, "property": params.timestamp_property})
+        items, truncated = _encode_items(results, params.format, params.max_string_length)
+        message = f"Synced {len(results)} changed Objects"
+        if error is not None:
+            message = f"Error syncing Objects after {len(results)} Objects: {str(error)}. Call again to continue"
+        return {
+                "success": error is None,
+                "message": message,
+                "items": items,
+                "total": len(results),
+                "format": params.format,
+                "truncated": truncated,
+                "watermark": new_state["watermark"] if new_state else None,
+                "previousWatermark": state["watermark"] if state else None,
+                "complete": error is None and len(results) < params.limit,
+                "pages": stats["pages"],
+                "bytes": stats["bytes"]
+            }
+    except Exception as e:
+        logger.error(f"Error syncing {params.object_type_id} Objects: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Error syncing {params.object_type_id} Objects: {str(e)}",
+            "items": [],
+            "total": 0
+        }
+
+@mcp.tool()
+@_observed
+async def mirror_objects(params: MirrorObjectsParams):
+
+    """Load an Object Type into the local SQL mirror, or drop it, so search_objects and aggregate_objects can answer it offline.
+
+    Searches using eq, gt, gte, lt, lte, in, isNull and startsWith on mirrored
+    properties, and aggregations with exact grouping and count, sum, min, max
+    or avg, are answered from the mirror while it is younger than
+    MIRROR_MAX_AGE and no action touched the Object Type since it was loaded.
+    Everything else is sent to Palantir.
+    """
+
+    try:
+        if params.drop:
+            loading = _mirror_refreshes.get(f"{params.ontology}::{params.object_type_id}")
+            if loading is not None and not loading.done():
+                await asyncio.wait([loading])
+            dropped = await asyncio.to_thread(_mirror.drop, params.ontology, params.object_type_id)
+            return {
+                    "success": True,
+                    "message": f"Dropped the mirror of {params.object_type_id}" if dropped else f"{params.object_type_id} is not mirrored",
+                    "item": None
+                }
+        start = time.monotonic()
+        state = await _refresh_mirror(params.ontology, params.object_type_id, properties=params.properties,
+                                      indexes=params.indexes, auto_refresh=params.auto_refresh)
+        return {
+                "success": True,
+                "message": f"Mirrored {state['rows']} {params.object_type_id} Objects in {time.monotonic() - start:.1f}s",
+                "item": state
+            }
+    except Exception as e:
+        logger.error(f"Error mirroring {params.object_type_id} Objects: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Error mirroring {params.object_type_id} Objects: {str(e)}",
+            "item": None
+        }
+
 if __name__ == "__main__":
     mcp.run(transport="stdio")
    
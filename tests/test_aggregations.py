@@ -0,0 +1,100 @@
+import pytest
+
+from servers.palantir_tools import (
+    _merge_aggregations,
+    _named_aggregations,
+    _partition_bounds,
+    _partitioned_aggregations,
+)
+
+
+def test_integer_partitions_cover_the_range_once():
+    bounds = _partition_bounds({"field": "v", "start": 0, "end": 10, "partitions": 3})
+    assert bounds == [(0, 3, False), (3, 6, False), (6, 10, True)]
+
+
+def test_integer_partitions_skip_empty_ranges():
+    bounds = _partition_bounds({"field": "v", "start": 0, "end": 2, "partitions": 4})
+    assert bounds == [(0, 1, False), (1, 2, True)]
+
+
+def test_float_partitions():
+    bounds = _partition_bounds({"field": "v", "start": 0.0, "end": 1.0, "partitions": 4})
+    assert bounds == [(0.0, 0.25, False), (0.25, 0.5, False), (0.5, 0.75, False), (0.75, 1.0, True)]
+
+
+def test_timestamp_partitions_keep_the_utc_suffix():
+    bounds = _partition_bounds({"field": "ts", "start": "2024-01-01T00:00:00Z", "end": "2024-01-02T00:00:00Z",
+                                "partitions": 4})
+    assert bounds == [
+        ("2024-01-01T00:00:00Z", "2024-01-01T06:00:00Z", False),
+        ("2024-01-01T06:00:00Z", "2024-01-01T12:00:00Z", False),
+        ("2024-01-01T12:00:00Z", "2024-01-01T18:00:00Z", False),
+        ("2024-01-01T18:00:00Z", "2024-01-02T00:00:00Z", True),
+    ]
+
+
+def test_explicit_ranges_are_end_exclusive():
+    assert _partition_bounds({"field": "v", "ranges": [[0, 5], [5, 10]]}) == [(0, 5, False), (5, 10, False)]
+
+
+def test_unnamed_aggregations_get_default_names():
+    assert _named_aggregations(None) == [{"count": ["count"]}]
+    assert _named_aggregations([{"count": []}, {"avg": ["v"]}, {"max": ["v", "top"]}]) == [
+        {"count": ["count"]}, {"avg": ["v", "avg_v"]}, {"max": ["v", "top"]}]
+
+
+def _response(*groups):
+    return {"data": [{"group": group, "metrics": [{"name": k, "value": v} for k, v in metrics.items()]}
+                     for group, metrics in groups]}
+
+
+def test_merge_sums_counts_and_keeps_extremes():
+    internal, metrics, non_null = _partitioned_aggregations(
+        _named_aggregations([{"count": []}, {"sum": ["v"]}, {"min": ["v"]}, {"max": ["v"]}]))
+    assert non_null == {}
+    assert internal == [{"count": ["__0_count"]}, {"sum": ["v", "__1_sum"]}, {"min": ["v", "__2_min"]},
+                        {"max": ["v", "__3_max"]}]
+    merged = _merge_aggregations([
+        _response(({"c": "a"}, {"__0_count": 2, "__1_sum": 5, "__2_min": 1, "__3_max": 4}),
+                  ({"c": "b"}, {"__0_count": 1, "__1_sum": 7, "__2_min": 7, "__3_max": 7})),
+        _response(({"c": "a"}, {"__0_count": 3, "__1_sum": 30, "__2_min": 6, "__3_max": 12})),
+    ], metrics)
+    assert merged == [
+        {"group": {"c": "a"}, "metrics": [{"name": "count", "value": 5}, {"name": "sum_v", "value": 35},
+                                          {"name": "min_v", "value": 1}, {"name": "max_v", "value": 12}]},
+        {"group": {"c": "b"}, "metrics": [{"name": "count", "value": 1}, {"name": "sum_v", "value": 7},
+                                          {"name": "min_v", "value": 7}, {"name": "max_v", "value": 7}]},
+    ]
+
+
+def test_avg_divides_by_the_objects_that_have_a_value():
+    internal, metrics, non_null = _partitioned_aggregations(_named_aggregations([{"avg": ["v"]}, {"count": []}]))
+    assert internal == [{"sum": ["v", "__0_sum"]}, {"count": ["__1_count"]}]
+    counted = non_null["v"]
+    # Two partitions of 4 and 5 objects, of which 2 and 3 have a value.
+    merged = _merge_aggregations([
+        _response(({}, {"__0_sum": 10, "__1_count": 4})),
+        _response(({}, {"__0_sum": 20, "__1_count": 5})),
+        _response(({}, {counted: 2})),
+        _response(({}, {counted: 3})),
+    ], metrics)
+    assert merged == [{"group": {}, "metrics": [{"name": "avg_v", "value": pytest.approx(6.0)},
+                                                {"name": "count", "value": 9}]}]
+
+
+def test_avg_of_only_null_values_is_none():
+    _, metrics, non_null = _partitioned_aggregations(_named_aggregations([{"avg": ["v"]}]))
+    merged = _merge_aggregations([_response(({}, {"__0_sum": None})), _response(({}, {non_null["v"]: 0}))], metrics)
+    assert merged == [{"group": {}, "metrics": [{"name": "avg_v", "value": None}]}]
+
+
+def test_averages_of_one_property_share_a_count():
+    _, _, non_null = _partitioned_aggregations([{"avg": ["v", "a"]}, {"avg": ["v", "b"]}, {"avg": ["w", "c"]}])
+    assert set(non_null) == {"v", "w"}
+    assert non_null["v"] != non_null["w"]
+
+
+def test_unmergeable_aggregations_are_refused():
+    with pytest.raises(ValueError):
+        _partitioned_aggregations([{"approximateDistinct": ["v", "d"]}])
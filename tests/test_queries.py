@@ -0,0 +1,91 @@
+import sqlite3
+
+import pytest
+
+from servers.palantir_tools import MirrorUnsupportedError, _compile_where, _mirror_value, _where_sql
+
+SCHEMA = {"apiName": "T", "properties": {"name": {}, "v": {}, "ts": {}}}
+COLUMNS = {"name": "text", "v": "integer", "ts": "timestamp", "tags": "json"}
+ROWS = [
+    ("a", "alpha", 1, "2024-01-01T00:00:00Z"),
+    ("b", "beta", 2, "2024-01-01T00:00:00.500Z"),
+    ("c", "gamma", 3, "2024-01-01T01:00:00+01:00"),
+    ("d", None, None, None),
+]
+
+
+def test_single_condition():
+    assert _compile_where([{"eq": ["name", "x"]}], SCHEMA) == {"type": "eq", "field": "name", "value": "x"}
+
+
+def test_several_conditions_are_combined_with_and():
+    assert _compile_where([{"eq": ["name", "x"]}, {"gt": ["v", 3]}], SCHEMA) == {"type": "and", "value": [
+        {"type": "eq", "field": "name", "value": "x"}, {"type": "gt", "field": "v", "value": 3}]}
+
+
+def test_nested_conditions():
+    where = _compile_where([{"or": [{"eq": ["name", "x"]}, {"in": ["v", [1, 2]]}]}, {"not": [{"isNull": ["ts", True]}]}],
+                           SCHEMA)
+    assert where == {"type": "and", "value": [
+        {"type": "or", "value": [{"type": "eq", "field": "name", "value": "x"},
+                                 {"type": "in", "field": "v", "value": [1, 2]}]},
+        {"type": "not", "value": {"type": "isNull", "field": "ts", "value": True}}]}
+
+
+def test_plans_of_one_shape_take_each_calls_values():
+    assert _compile_where([{"eq": ["v", 1]}])["value"] == 1
+    assert _compile_where([{"eq": ["v", 2]}])["value"] == 2
+
+
+def test_no_conditions():
+    assert _compile_where([], SCHEMA) is None
+
+
+def test_unknown_properties_are_refused():
+    with pytest.raises(ValueError, match="nope"):
+        _compile_where([{"eq": ["nope", 1]}], SCHEMA)
+
+
+@pytest.fixture
+def table():
+    connection = sqlite3.connect(":memory:")
+    connection.execute('CREATE TABLE t ("__primaryKey" TEXT, "name" TEXT, "v" INTEGER, "ts" TEXT)')
+    connection.executemany("INSERT INTO t VALUES (?, ?, ?, ?)",
+                           [(pk, name, v, _mirror_value(ts, "timestamp")) for pk, name, v, ts in ROWS])
+    def select(conditions):
+        sql, args = _where_sql(_compile_where(conditions), COLUMNS)
+        return sorted(row[0] for row in connection.execute(f'SELECT "__primaryKey" FROM t WHERE {sql}', args))
+    yield select
+    connection.close()
+
+
+def test_where_sql_and(table):
+    assert table([{"gte": ["v", 2]}, {"startsWith": ["name", "g"]}]) == ["c"]
+
+
+def test_where_sql_or_and_in(table):
+    assert table([{"or": [{"eq": ["name", "alpha"]}, {"in": ["v", [3]]}]}]) == ["a", "c"]
+
+
+def test_where_sql_not_matches_objects_without_the_property(table):
+    assert table([{"not": [{"gt": ["v", 1]}]}]) == ["a", "d"]
+
+
+def test_where_sql_is_null(table):
+    assert table([{"isNull": ["name", True]}]) == ["d"]
+    assert table([{"isNull": ["name", False]}]) == ["a", "b", "c"]
+
+
+def test_where_sql_compares_timestamps_as_instants(table):
+    assert table([{"gt": ["ts", "2024-01-01T00:00:00Z"]}]) == ["b"]
+    assert table([{"eq": ["ts", "2024-01-01T00:00:00.000Z"]}]) == ["a", "c"]
+    assert table([{"in": ["ts", ["2024-01-01T00:00:00.5Z"]]}]) == ["b"]
+
+
+def test_where_sql_refuses_what_the_mirror_cannot_answer():
+    with pytest.raises(MirrorUnsupportedError):
+        _where_sql(_compile_where([{"contains": ["name", "x"]}]), COLUMNS)
+    with pytest.raises(MirrorUnsupportedError):
+        _where_sql(_compile_where([{"eq": ["tags", "x"]}]), COLUMNS)
+    with pytest.raises(MirrorUnsupportedError):
+        _where_sql(_compile_where([{"gt": ["ts", "yesterday"]}]), COLUMNS)